@@ -1,8 +1,12 @@
 import pandas as pd
 import streamlit as st
 
+from profiler import page_profiler
+from results_store import session_store
+
 # Oldal beállítás
 st.set_page_config(page_title="Eredmények betöltése", page_icon="📝", layout="wide")
+prof = page_profiler("Eredmények betöltése")  # WA_PROFILE=1 vagy ?profile=1
 
 # ====== Állapot inicializálás ======
 if "gender" not in st.session_state:
@@ -11,8 +15,7 @@ if "gender" not in st.session_state:
 if "manual_cards" not in st.session_state:
     st.session_state.manual_cards = [{"Táv":"", "Idő":""} for _ in range(4)]
 
-if "idok" not in st.session_state:
-    st.session_state.idok = pd.DataFrame(columns=["Versenyszám","Idő","Gender"])
+idok_store = session_store(st.session_state)  # st.session_state.idok: kulcsolt eredménytár
 
 # ====== Események + formátumok ======
 event_time_formats = {
@@ -79,21 +82,22 @@ st.session_state.gender = "Man" if nem_val == "Férfi" else "Woman"
 st.subheader("Manuális eredmények")
 st.caption("Válaszd ki a versenyszámot, add meg az időt (pl. 16:45.2 vagy 1:15:30), majd add a táblázathoz.")
 
-for i in range(0, len(st.session_state.manual_cards), 4):
-    cols = st.columns(4)
-    for j in range(4):
-        idx = i + j
-        if idx >= len(st.session_state.manual_cards): break
-        k = st.session_state.manual_cards[idx]
-        cap = k["Táv"] if k["Táv"] else f"Kártya #{idx+1}"
-        with cols[j].expander(cap, expanded=True):
-            k["Táv"] = st.selectbox("Versenyszám", [""] + EVENT_OPTIONS,
-                                    index=([""] + EVENT_OPTIONS).index(k["Táv"]) if k["Táv"] in EVENT_OPTIONS else 0,
-                                    key=f"manual_tav_{idx}")
-            k["Idő"] = st.text_input("Időeredmény", value=k.get("Idő",""), key=f"manual_ido_{idx}")
-            if st.button("Eltávolítás", key=f"manual_rm_{idx}"):
-                st.session_state.manual_cards.pop(idx)
-                st.rerun()
+with prof.section("Manuális kártyák"):
+    for i in range(0, len(st.session_state.manual_cards), 4):
+        cols = st.columns(4)
+        for j in range(4):
+            idx = i + j
+            if idx >= len(st.session_state.manual_cards): break
+            k = st.session_state.manual_cards[idx]
+            cap = k["Táv"] if k["Táv"] else f"Kártya #{idx+1}"
+            with cols[j].expander(cap, expanded=True):
+                k["Táv"] = st.selectbox("Versenyszám", [""] + EVENT_OPTIONS,
+                                        index=([""] + EVENT_OPTIONS).index(k["Táv"]) if k["Táv"] in EVENT_OPTIONS else 0,
+                                        key=f"manual_tav_{idx}")
+                k["Idő"] = st.text_input("Időeredmény", value=k.get("Idő",""), key=f"manual_ido_{idx}")
+                if st.button("Eltávolítás", key=f"manual_rm_{idx}"):
+                    st.session_state.manual_cards.pop(idx)
+                    st.rerun()
 
 c1, c2 = st.columns([1,1])
 with c1:
@@ -112,8 +116,8 @@ with c2:
         if rows:
             add_df = pd.DataFrame(rows)
             # Egy versenyszámhoz csak egy idő maradjon
-            st.session_state.idok = pd.concat([st.session_state.idok, add_df], ignore_index=True)
-            st.session_state.idok.drop_duplicates(subset=["Versenyszám","Gender"], keep="last", inplace=True)
+            with prof.section("Beszúrás az IDŐK táblába"):
+                idok_store.upsert_frame(add_df, replace_events=True)
             st.success(f"Hozzáadva {len(add_df)} sor (felülírás, ha volt már ilyen versenyszám).")
 
 st.divider()
@@ -121,32 +125,34 @@ st.divider()
 # ====== IDŐK tábla + törlés ======
 st.subheader("Összesített táblázat")
 
-if st.session_state.idok.empty:
-    st.info("Még nincs adat a táblázatban.")
-else:
-    to_show = st.session_state.idok.copy().reset_index().rename(columns={"index": "Sorszám"})
-    to_show["Törlés"] = False
-
-    edited = st.data_editor(
-        to_show,
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            "Törlés": st.column_config.CheckboxColumn("Törlés", help="Jelöld be és nyomd meg a Törlés gombot"),
-        },
-        disabled=["Sorszám"],
-        num_rows="fixed"
-    )
-
-    if st.button("🗑️ Kijelöltek törlése"):
-        to_delete_idx = edited.loc[edited["Törlés"] == True, "Sorszám"].tolist()
-        if to_delete_idx:
-            st.session_state.idok.drop(index=to_delete_idx, inplace=True, errors="ignore")
-            st.session_state.idok.reset_index(drop=True, inplace=True)
-            st.success(f"Törölve: {len(to_delete_idx)} sor.")
-            st.rerun()
+with prof.section("IDŐK tábla"):
+    if idok_store.empty:
+        st.info("Még nincs adat a táblázatban.")
+    else:
+        to_show = idok_store.frame()[["Versenyszám", "Idő", "Gender"]].rename_axis("Sorszám").reset_index()
+        to_show["Törlés"] = False
+
+        edited = st.data_editor(
+            to_show,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Törlés": st.column_config.CheckboxColumn("Törlés", help="Jelöld be és nyomd meg a Törlés gombot"),
+            },
+            disabled=["Sorszám"],
+            num_rows="fixed"
+        )
+
+        if st.button("🗑️ Kijelöltek törlése"):
+            to_delete_idx = edited.loc[edited["Törlés"] == True, "Sorszám"].tolist()
+            if to_delete_idx:
+                idok_store.delete(to_delete_idx)
+                st.success(f"Törölve: {len(to_delete_idx)} sor.")
+                st.rerun()
 
 # ====== Gomb a második oldalra ======
 st.divider()
 if st.button("➡️ Tovább az Adatelemzés oldalra"):
     st.switch_page("pages/02_AdatElemzes.py")
+
+prof.render()
@@ -0,0 +1,437 @@
+# analysis.py
+"""
+Kritikus sebesség, Riegel-exponens és WA pont számítás UI nélkül.
+
+Minden függvény sportolók csoportjain fut egyszerre: a bemenet egy "hosszú"
+eredménytábla (sportolónként több sor), a csoportonkénti összegeket
+`np.bincount` adja, így több ezer sportoló is egy menetben számolható.
+Az Adatelemzés oldal ugyanezeket a függvényeket hívja egyetlen csoporttal.
+
+    python analysis.py eredmenyek.csv elemzes.csv --gender Man
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from time_parse import to_seconds
+
+EVENT_TO_METERS = {
+    "50 Metres": 50, "55 Metres": 55, "60 Metres": 60, "100 Metres": 100,
+    "200 Metres": 200, "200 Metres Short Track": 200, "300 Metres": 300,
+    "300 Metres Short Track": 300, "400 Metres": 400, "400 Metres Short Track": 400,
+    "500 Metres": 500, "500 Metres Short Track": 500, "600 Metres": 600,
+    "600 Metres Short Track": 600, "800 Metres": 800, "800 Metres Short Track": 800,
+    "1000 Metres": 1000, "1000 Metres Short Track": 1000, "1500 Metres": 1500,
+    "1500 Metres Short Track": 1500, "Mile": 1609.34, "Mile Short Track": 1609.34,
+    "2000 Metres": 2000, "2000 Metres Short Track": 2000, "3000 Metres": 3000,
+    "3000 Metres Short Track": 3000, "2 Miles": 3218.68, "2 Miles Short Track": 3218.68,
+    "5000 Metres": 5000, "5000 Metres Short Track": 5000, "10000 Metres": 10000,
+    "5 Kilometres Road": 5000, "10 Kilometres Road": 10000, "15 Kilometres Road": 15000,
+    "20 Kilometres Road": 20000, "25 Kilometres Road": 25000, "30 Kilometres Road": 30000,
+    "10 Miles Road": 16093.4, "Half Marathon": 21097.5, "Marathon": 42195,
+    "100 Kilometres Road": 100000,
+}
+
+# a CS illesztéshez ajánlott időtartomány (3–20 perc)
+CS_WINDOW = (180.0, 1200.0)
+DEFAULT_TARGETS = ["1500 Metres", "5000 Metres", "10000 Metres", "Half Marathon", "Marathon"]
+
+# elfogadott oszlopnevek a bemenetben (az első létező nyer)
+ATHLETE_COLS = ["Sportoló", "Athlete", "athlete", "URL", "url", "Név", "Name"]
+EVENT_COLS = ["Versenyszám", "Discipline", "discipline", "event"]
+TIME_COLS = ["Idő", "Performance", "performance", "result", "time"]
+GENDER_COLS = ["Gender", "gender", "Nem"]
+DATE_COLS = ["Dátum", "Date", "date"]
+
+
+# ====== Csoportos (súlyozott) lineáris illesztés ======
+def _n_groups(groups: np.ndarray, n_groups):
+    if n_groups is not None:
+        return int(n_groups)
+    return int(groups.max()) + 1 if len(groups) else 0
+
+
+def _group_sum(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Csoportonkénti összeg; `values` lehet (n,) vagy (n, J) (J jelölt egyszerre)."""
+    if values.ndim == 1:
+        return np.bincount(groups, values, n_groups)
+    j = values.shape[1]
+    idx = (groups[:, None] * j + np.arange(j)[None, :]).ravel()
+    return np.bincount(idx, values.ravel(), n_groups * j).reshape(n_groups, j)
+
+
+def _group_wls(groups, x, y, w, n_groups: int) -> dict:
+    """
+    Csoportonkénti súlyozott y = a·x + b illesztés diagnosztikával.
+    x, y lehet (n,) vagy (n, J) alakú: ekkor J független illesztés fut csoportonként
+    (pl. a 3-paraméteres modell CS jelöltjei), egyetlen menetben.
+    Visszatérés: a, b, n, se_a, se_b, r2, rmse, sse (csoportonként).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    w = np.broadcast_to(np.asarray(w, dtype=float).reshape(-1, *([1] * (x.ndim - 1))), x.shape)
+    ok = np.isfinite(x) & np.isfinite(y) & np.isfinite(w) & (w > 0)
+    w = np.where(ok, w, 0.0)
+    x = np.where(ok, x, 0.0)
+    y = np.where(ok, y, 0.0)
+
+    n = _group_sum(groups, ok.astype(float), n_groups)
+    sw = _group_sum(groups, w, n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # középre igazítva a numerikus stabilitásért (másodperc ~ 10^3, négyzete ~ 10^6)
+        mx = _group_sum(groups, w * x, n_groups) / sw
+        my = _group_sum(groups, w * y, n_groups) / sw
+        dx = np.where(ok, x - mx[groups], 0.0)
+        dy = np.where(ok, y - my[groups], 0.0)
+        sxx = _group_sum(groups, w * dx * dx, n_groups)
+        sxy = _group_sum(groups, w * dx * dy, n_groups)
+        syy = _group_sum(groups, w * dy * dy, n_groups)
+        a = np.where((n >= 2) & (sxx > 0), sxy / sxx, np.nan)
+        b = my - a * mx
+        sse = np.maximum(syy - a * sxy, 0.0)
+        dof = n - 2
+        sigma2 = np.where(dof > 0, sse / dof * n / sw, np.nan)  # relatív súlyokra skálázva
+        se_a = np.sqrt(sigma2 / sxx)
+        se_b = np.sqrt(sigma2 * (1.0 / sw + mx * mx / sxx))
+        r2 = np.where(syy > 0, 1.0 - sse / syy, np.nan)
+        rmse = np.sqrt(sse / sw)
+    return {"a": a, "b": b, "n": n.astype(int), "se_a": se_a, "se_b": se_b,
+            "r2": np.where(np.isfinite(a), r2, np.nan), "rmse": np.where(np.isfinite(a), rmse, np.nan),
+            "sse": np.where(np.isfinite(a), sse, np.nan)}
+
+
+def _group_linfit(groups: np.ndarray, x: np.ndarray, y: np.ndarray, n_groups: int):
+    """Csoportonkénti y = a·x + b legkisebb négyzetes illesztés. Visszatérés: (a, b, n)."""
+    fit = _group_wls(groups, x, y, np.ones(len(x)), n_groups)
+    return fit["a"], fit["b"], fit["n"]
+
+
+# ====== Kritikus sebesség modellek ======
+CS_MODELS = {
+    "linear": "Lineáris (táv = CS·idő + D′)",
+    "inverse": "Inverz idő (sebesség = CS + D′/idő)",
+    "morton": "3-paraméteres (Morton)",
+}
+_MORTON_GRID = 64
+
+
+def _fit_morton(groups, t, d, w, n_groups):
+    """
+    3-paraméteres modell: t = D′/(v − CS) + D′/(CS − vmax).
+    Rögzített CS mellett t lineáris 1/(v − CS)-ben (meredekség D′, tengelymetszet
+    D′/(CS − vmax)), így a CS-re csak egy 1D keresés kell: csoportonként egy
+    durva, majd egy finom rács, az összes sportolóra és jelöltre egyszerre.
+    """
+    v = d / t
+    ok = np.isfinite(v)
+    vmin = np.full(n_groups, np.inf)
+    np.minimum.at(vmin, groups[ok], v[ok])
+    vmin[~np.isfinite(vmin)] = np.nan
+    # CS < a leglassabb eredmény sebessége; a rács a vmin közelében sűrűbb
+    rows = np.arange(n_groups)
+    f = np.tile(1.0 - np.geomspace(1e-4, 0.6, _MORTON_GRID), (n_groups, 1))   # (G, J), csökkenő
+    for refine in (False, True):
+        if refine:
+            # finom rács a durva legjobb jelölt két szomszédja között
+            lo = f[rows, np.minimum(best + 1, _MORTON_GRID - 1)]
+            hi = f[rows, np.maximum(best - 1, 0)]
+            f = hi[:, None] - (hi - lo)[:, None] * np.linspace(0.0, 1.0, _MORTON_GRID)[None, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x = 1.0 / (v[:, None] - (vmin[:, None] * f)[groups])      # (n, J)
+        fit = _group_wls(groups, x, t[:, None], w, n_groups)
+        sse = np.where(fit["a"] > 0, fit["sse"], np.inf)
+        best = np.argmin(sse, axis=1)
+    pick = lambda arr: arr[rows, best]
+    cs = vmin * pick(f)
+    dprime, k = pick(fit["a"]), pick(fit["b"])
+    valid = np.isfinite(pick(sse)) & (fit["n"][:, 0] >= 3)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vmax = np.where(k < 0, cs - dprime / k, np.inf)
+    nan = np.full(n_groups, np.nan)
+    return {
+        "cs": np.where(valid, cs, np.nan), "dprime": np.where(valid, dprime, np.nan),
+        "vmax": np.where(valid, vmax, np.nan), "n": fit["n"][:, 0],
+        "r2": np.where(valid, pick(fit["r2"]), np.nan), "rmse": np.where(valid, pick(fit["rmse"]), np.nan),
+        "se_cs": nan, "se_dprime": np.where(valid, pick(fit["se_a"]), np.nan),
+    }
+
+
+def fit_critical_speed(groups, seconds, meters, model: str = "linear", weights=None,
+                       n_groups=None, window=CS_WINDOW) -> pd.DataFrame:
+    """
+    Kritikus sebesség illesztése csoportonként (sportolónként), tetszőleges számú eredményből.
+
+    model: 'linear' (táv–idő), 'inverse' (sebesség–1/idő) vagy 'morton' (3 paraméter, min. 3 eredmény).
+    weights: eredményenkénti súly (pl. frissesség), None = egyenlő súlyok.
+    window=(lo, hi): csak ebbe az időtartományba (mp) eső eredmények (None: mind).
+
+    Visszatérés: DataFrame csoportonként: cs [m/s], dprime [m], vmax [m/s, csak morton],
+    n, r2, rmse (a modell saját válaszváltozójában: m, m/s ill. s), se_cs, se_dprime.
+    """
+    if model not in CS_MODELS:
+        raise ValueError(f"Ismeretlen CS modell: {model}")
+    groups = np.asarray(groups, dtype=np.intp)
+    t = np.asarray(seconds, dtype=float)
+    d = np.asarray(meters, dtype=float)
+    w = np.ones(len(t)) if weights is None else np.asarray(weights, dtype=float)
+    n_groups = _n_groups(groups, n_groups)
+    if window is not None:
+        t = np.where((t >= window[0]) & (t <= window[1]), t, np.nan)
+
+    if model == "morton":
+        res = _fit_morton(groups, t, d, w, n_groups)
+    elif model == "linear":
+        fit = _group_wls(groups, t, d, w, n_groups)
+        res = {"cs": fit["a"], "dprime": fit["b"], "se_cs": fit["se_a"], "se_dprime": fit["se_b"]}
+    else:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fit = _group_wls(groups, 1.0 / t, d / t, w, n_groups)
+        res = {"cs": fit["b"], "dprime": fit["a"], "se_cs": fit["se_b"], "se_dprime": fit["se_a"]}
+    if model != "morton":
+        res.update(vmax=np.full(n_groups, np.nan), n=fit["n"], r2=fit["r2"], rmse=fit["rmse"])
+    return pd.DataFrame(res, columns=["cs", "dprime", "vmax", "n", "r2", "rmse", "se_cs", "se_dprime"])
+
+
+def critical_speed(groups, seconds, meters, n_groups=None, window=CS_WINDOW):
+    """
+    Kritikus sebesség és D′ csoportonként a lineáris modellel (táv = CS·idő + D′).
+    Visszatérés: (cs [m/s], dprime [m], felhasznált eredmények száma).
+    """
+    res = fit_critical_speed(groups, seconds, meters, "linear", n_groups=n_groups, window=window)
+    return res["cs"].to_numpy(), res["dprime"].to_numpy(), res["n"].to_numpy()
+
+
+# Edzészónák: (név, tartomány felirat, lassabb határ, gyorsabb határ) a CS tempó arányában
+CS_ZONES = [
+    ("Z1 Regeneráció", ">124%", None, 1.24),
+    ("Z2 Állóképesség", "124–115%", 1.24, 1.15),
+    ("Z3 Tempó", "114–105%", 1.14, 1.05),
+    ("Z4 Threshold", "104–95%", 1.04, 0.95),
+    ("Z5 VO₂max", "94–84%", 0.94, 0.84),
+    ("Z6 Anaerob", "<84%", 0.84, None),
+]
+
+
+def cs_zone_table(pace_s_per_km) -> pd.DataFrame:
+    """Zónahatárok (mp/km) sportolónként egy menetben: '<zóna> lassú' / '<zóna> gyors' oszlopok."""
+    pace = np.asarray(pace_s_per_km, dtype=float)
+    cols = {}
+    for name, _, slow, fast in CS_ZONES:
+        cols[f"{name} lassú"] = pace * slow if slow else np.full(pace.shape, np.nan)
+        cols[f"{name} gyors"] = pace * fast if fast else np.full(pace.shape, np.nan)
+    return pd.DataFrame(cols)
+
+
+def recency_weights(dates, half_life_days: float = 365.0, today=None) -> np.ndarray:
+    """Frissességi súly: 2^(−kor/felezési idő); ismeretlen dátum súlya 1."""
+    dt = pd.to_datetime(pd.Series(dates), errors="coerce")
+    ref = pd.Timestamp(today) if today is not None else pd.Timestamp.today().normalize()
+    age = (ref - dt).dt.days.to_numpy(dtype=float)
+    return np.where(np.isfinite(age), 0.5 ** (np.maximum(age, 0) / half_life_days), 1.0)
+
+
+# ====== Riegel ======
+def riegel_fit(groups, seconds, meters, n_groups=None, window=None) -> pd.DataFrame:
+    """
+    Riegel k csoportonként log–log regresszióval: ln T = k·ln D + c, az összes eredményből
+    (két eredménynél pontosan a klasszikus k = ln(T₂/T₁)/ln(D₂/D₁)).
+    `window=(min_m, max_m)` csak ebbe a távtartományba eső eredményeket használja.
+    Visszatérés: DataFrame csoportonként: k, c, n, r2, se_k.
+    """
+    groups = np.asarray(groups, dtype=np.intp)
+    t = np.asarray(seconds, dtype=float)
+    d = np.asarray(meters, dtype=float)
+    n_groups = _n_groups(groups, n_groups)
+    if window is not None:
+        d = np.where((d >= window[0]) & (d <= window[1]), d, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fit = _group_wls(groups, np.log(d), np.log(t), np.ones(len(t)), n_groups)
+    return pd.DataFrame({"k": fit["a"], "c": fit["b"], "n": fit["n"], "r2": fit["r2"], "se_k": fit["se_a"]})
+
+
+def riegel_exponent(groups, seconds, meters, n_groups=None, window=None):
+    """Riegel k és a felhasznált eredmények száma csoportonként (lásd `riegel_fit`)."""
+    fit = riegel_fit(groups, seconds, meters, n_groups, window)
+    return fit["k"].to_numpy(), fit["n"].to_numpy()
+
+
+def riegel_predict_grid(groups, seconds, meters, k, targets_m, n_groups=None):
+    """
+    Várható idők csoportonként az összes céltávra egy hívásban: T_ref·(D_target/D_ref)^k,
+    ahol a referencia a célhoz táv szerint legközelebbi eredmény (azonos távon a legjobb idő;
+    egyenlő távolságnál a rövidebb táv).
+    Visszatérés: (pred, ref_m, ref_s), mindegyik (csoport, céltáv) alakú.
+    """
+    groups = np.asarray(groups, dtype=np.intp)
+    t = np.asarray(seconds, dtype=float)
+    d = np.asarray(meters, dtype=float)
+    targets = np.atleast_1d(np.asarray(targets_m, dtype=float))
+    n_groups = _n_groups(groups, n_groups)
+    k = np.asarray(k, dtype=float)
+
+    ok = np.flatnonzero(np.isfinite(t) & np.isfinite(d) & (d > 0))
+    # (csoport, táv, idő) szerint rendezve; távonként csak a legjobb idő marad
+    ok = ok[np.lexsort((t[ok], d[ok], groups[ok]))]
+    keep = np.r_[True, (groups[ok][1:] != groups[ok][:-1]) | (d[ok][1:] != d[ok][:-1])] if len(ok) else ok
+    g_s, d_s, t_s = groups[ok][keep], d[ok][keep], t[ok][keep]
+
+    if not len(d_s):
+        empty = np.full((n_groups, len(targets)), np.nan)
+        return empty, empty.copy(), empty.copy()
+
+    # csoporton belüli bináris keresés egyetlen rendezett kulcson: csoport·SCALE + táv
+    scale = max(d_s.max(), targets.max()) * 2 + 1
+    keys = g_s * scale + d_s
+    gq = np.arange(n_groups)[:, None]
+    pos = np.searchsorted(keys, gq * scale + targets[None, :])      # (G, E)
+    left, right = np.maximum(pos - 1, 0), np.minimum(pos, len(keys) - 1)
+    left_ok = (pos > 0) & (g_s[left] == gq)
+    right_ok = (pos < len(keys)) & (g_s[right] == gq)
+    dist_l = np.where(left_ok, np.abs(targets - d_s[left]), np.inf)
+    dist_r = np.where(right_ok, np.abs(d_s[right] - targets), np.inf)
+    ref = np.where(dist_l <= dist_r, left, right)
+    has = left_ok | right_ok
+
+    ref_m = np.where(has, d_s[ref], np.nan)
+    ref_s = np.where(has, t_s[ref], np.nan)
+    with np.errstate(invalid="ignore"):
+        pred = ref_s * (targets[None, :] / ref_m) ** k[:, None]
+    return pred, ref_m, ref_s
+
+
+def riegel_predict(groups, seconds, meters, k, target_m, n_groups=None):
+    """Várható idő egyetlen `target_m` távra csoportonként (lásd `riegel_predict_grid`)."""
+    return riegel_predict_grid(groups, seconds, meters, k, [target_m], n_groups)[0][:, 0]
+
+
+# ====== Batch elemzés ======
+def _pick(df: pd.DataFrame, names: list[str], what: str, required=True):
+    col = next((c for c in names if c in df.columns), None)
+    if col is None and required:
+        raise ValueError(f"Hiányzó oszlop ({what}); elfogadott nevek: {', '.join(names)}")
+    return col
+
+
+def analyze_results(df: pd.DataFrame, gender: str = "Man", targets=DEFAULT_TARGETS,
+                    cs_window=CS_WINDOW, cs_model: str = "linear", half_life_days=None,
+                    zones: bool = False, score_table=None) -> pd.DataFrame:
+    """
+    Hosszú eredménytábla -> sportolónként egy sor:
+    CS, D′ (+ illesztési diagnosztika), CS tempó, Riegel k, várható idők
+    (pred_<versenyszám>, mp), WA pontok és kérésre a CS edzészónák.
+    `half_life_days` esetén a CS illesztés a dátum oszlop szerint frissességgel súlyoz.
+    """
+    a_col = _pick(df, ATHLETE_COLS, "sportoló")
+    e_col = _pick(df, EVENT_COLS, "versenyszám")
+    t_col = _pick(df, TIME_COLS, "idő")
+    g_col = _pick(df, GENDER_COLS, "nem", required=False)
+    d_col = _pick(df, DATE_COLS, "dátum", required=False)
+
+    codes, athletes = pd.factorize(df[a_col], sort=False)
+    keep = codes >= 0
+    df, codes = df[keep], codes[keep]
+    n = len(athletes)
+
+    seconds = to_seconds(df[t_col])
+    meters = df[e_col].map(EVENT_TO_METERS).to_numpy(dtype=float)
+    genders = df[g_col].fillna(gender).to_numpy() if g_col else np.full(len(df), gender, dtype=object)
+
+    weights = recency_weights(df[d_col], half_life_days) if half_life_days and d_col else None
+    cs_fit = fit_critical_speed(codes, seconds, meters, cs_model, weights=weights, n_groups=n, window=cs_window)
+    cs = cs_fit["cs"].to_numpy()
+    k, k_n = riegel_exponent(codes, seconds, meters, n)
+
+    out = pd.DataFrame({
+        "Sportoló": athletes,
+        "Nem": pd.Series(genders).groupby(codes).first().reindex(range(n)).to_numpy(),
+        "Eredmények": np.bincount(codes, minlength=n),
+        "CS (m/s)": cs,
+        "D′ (m)": cs_fit["dprime"].to_numpy(),
+        "CS tempó (mp/km)": 1000.0 / cs,
+        "CS eredmények": cs_fit["n"].to_numpy(),
+        "CS R²": cs_fit["r2"].to_numpy(),
+        "CS RMSE": cs_fit["rmse"].to_numpy(),
+        "Riegel k": k,
+        "Riegel eredmények": k_n,
+    })
+    if cs_model == "morton":
+        out.insert(out.columns.get_loc("CS tempó (mp/km)"), "vmax (m/s)", cs_fit["vmax"].to_numpy())
+    if targets:
+        pred, _, _ = riegel_predict_grid(codes, seconds, meters, k, [EVENT_TO_METERS[t] for t in targets], n)
+        for j, target in enumerate(targets):
+            out[f"pred_{target}"] = pred[:, j]
+
+    if score_table is None:
+        from wa_scores import load_score_table
+        score_table = load_score_table()
+    pts = score_table.points_batch(genders, df[e_col].to_numpy(), seconds)
+    pts_s = pd.Series(pts)
+    has = ~np.isnan(pts)
+    out["WA legjobb"] = pts_s.groupby(codes).max().reindex(range(n)).to_numpy()
+    out["WA átlag"] = pts_s.groupby(codes).mean().reindex(range(n)).to_numpy()
+    best_row = np.full(n, -1)
+    if has.any():
+        order = np.flatnonzero(has)[np.lexsort((-pts[has], codes[has]))]
+        first = order[np.r_[True, codes[order][1:] != codes[order][:-1]]]
+        best_row[codes[first]] = first
+    events = df[e_col].to_numpy()
+    out["WA legjobb versenyszám"] = np.where(best_row >= 0, events[best_row], None)
+    if zones:
+        out = pd.concat([out, cs_zone_table(1000.0 / cs)], axis=1)
+    return out
+
+
+def read_table(path) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return pd.read_parquet(path)
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        return pd.read_excel(path, dtype=str)
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""])
+
+
+def write_table(df: pd.DataFrame, path) -> None:
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, float_format="%.4f")
+
+
+# ====== CLI ======
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="CS, D′, Riegel k, várható idők és WA pontok sportolónként.")
+    ap.add_argument("input", help="eredménytábla (.csv / .parquet / .xlsx), pl. a roster_scrape.py kimenete")
+    ap.add_argument("output", help="kimenet (.csv / .parquet)")
+    ap.add_argument("--gender", default="Man", choices=["Man", "Woman"],
+                    help="nem, ha a bemenetben nincs Gender oszlop (alap: Man)")
+    ap.add_argument("--targets", nargs="*", default=DEFAULT_TARGETS,
+                    help="cél versenyszámok a Riegel előrejelzéshez")
+    ap.add_argument("--cs-window", nargs=2, type=float, default=CS_WINDOW, metavar=("MIN", "MAX"),
+                    help="CS illesztéshez használt időtartomány mp-ben (alap: 180 1200)")
+    ap.add_argument("--cs-model", default="linear", choices=list(CS_MODELS),
+                    help="CS modell: linear, inverse vagy morton (3 paraméter; alap: linear)")
+    ap.add_argument("--half-life", type=float, default=None, metavar="NAP",
+                    help="frissességi súlyozás felezési ideje napokban (Dátum oszlop alapján)")
+    ap.add_argument("--zones", action="store_true", help="CS edzészónák hozzáadása (mp/km)")
+    args = ap.parse_args(argv)
+
+    unknown = [t for t in args.targets if t not in EVENT_TO_METERS]
+    if unknown:
+        ap.error(f"ismeretlen versenyszám: {', '.join(unknown)}")
+
+    t0 = time.perf_counter()
+    df = read_table(args.input)
+    res = analyze_results(df, gender=args.gender, targets=args.targets, cs_window=tuple(args.cs_window),
+                          cs_model=args.cs_model, half_life_days=args.half_life, zones=args.zones)
+    write_table(res, args.output)
+    print(f"{len(res)} sportoló, {len(df)} eredmény – {time.perf_counter() - t0:.2f} mp", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
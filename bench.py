@@ -0,0 +1,495 @@
+# bench.py
+"""
+Offline benchmark a forró utakra, gépi formátumú baseline-nal.
+
+Mért területek (hálózat nem kell):
+  - ponttábla betöltés (artefaktum, CSV, közös cache, képlet) és WA pont lekérés (egy / tömeges),
+  - időparszolás az `EVENT_TIME_FORMATS` összes formátumára,
+  - CS és Riegel illesztés 1 – 10 000 sportolóra (+ a teljes `analyze_results`),
+  - PB tábla feldolgozás a `fixtures/wa` rögzített HTML oldalaiból, és a teljes HTTP út
+    (`fetch_pbs_http`) a lokális `wa_fixture_server` ellen,
+  - a Streamlit oldalak teljes rerunja a headless AppTest harness-szel.
+
+    python bench.py                     # futtatás + összevetés a bench_baseline.json-nal
+    python bench.py -k cs_fit -k riegel # csak a névben egyezők
+    python bench.py --update            # baseline (a futtatott mérésekre) felülírása
+    python bench.py --json out.json     # az eredmények JSON-ban is
+
+Lassulás: ha egy mérés legjobb ideje a baseline × tolerancia (alap 1.5) fölé megy,
+újramérés után is. Az időket egy rögzített referencia-munkához viszonyítjuk, így a gép
+pillanatnyi sebessége kiesik; eltérő gépre a WA_BENCH_SCALE szorzóval lazítható.
+Kilépési kód 1, ha bármelyik mérés lassult vagy hibára futott.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent
+BASELINE = ROOT / "bench_baseline.json"
+FIT_SIZES = (1, 100, 1000, 10000)
+PARSE_ROWS = 10000
+TARGET_SEC = 0.2   # ismétlésenként legalább ennyi ideig fut egy mérés
+REPEAT = 5
+TOLERANCE = 1.5
+RETRIES = 2        # lassulásgyanús mérés újramérése, mielőtt hibának számítana (zajos gépek)
+
+# név -> (leírás, setup): a setup előkészíti az adatot és a mérendő, argumentum nélküli függvényt adja
+BENCHMARKS = {}
+
+
+def bench(name: str, doc: str = ""):
+    def register(setup):
+        BENCHMARKS[name] = (doc, setup)
+        return setup
+    return register
+
+
+# ====== Mérés ======
+def measure(fn, target_sec: float = TARGET_SEC, repeat: int = REPEAT) -> dict:
+    """
+    timeit-szerű mérés: a hívásszámot úgy kalibráljuk, hogy egy ismétlés ~target_sec legyen.
+    Visszatérés: hívásonkénti legjobb és medián idő (s), hívásszám, ismétlésszám.
+    """
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    number = max(1, int(target_sec / first)) if first > 0 else 1000
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t0) / number)
+    return {"best_s": min(runs), "median_s": statistics.median(runs), "number": number, "repeat": repeat}
+
+
+_REF_DATA = np.random.default_rng(0).random(2000)
+
+
+def reference_s() -> float:
+    """
+    Rögzített referencia-munka (Python ciklus + numpy rendezés) ideje: a gép pillanatnyi
+    sebességének mércéje. A mérések ehhez viszonyítva kerülnek a baseline-ba, így a
+    megosztott / fojtott CPU sebességingadozása nem látszik lassulásnak.
+    """
+    return measure(lambda: (sum(range(2000)), np.sort(_REF_DATA)), target_sec=0.05, repeat=3)["best_s"]
+
+
+def run_benchmark(fn, repeat: int = REPEAT) -> dict:
+    """`measure` + a közvetlenül utána mért referencia, és a kettő aránya (`rel`)."""
+    res = measure(fn, repeat=repeat)
+    res["ref_s"] = reference_s()
+    res["rel"] = res["best_s"] / res["ref_s"]
+    return res
+
+
+def _ratio(res: dict, base: dict) -> float:
+    """Lassulási arány a baseline-hoz: referenciához viszonyítva, ha a baseline-ban is van."""
+    if base.get("rel"):
+        return res["rel"] / base["rel"]
+    return res["best_s"] / base["best_s"]
+
+
+def page_constant(path: Path, name: str):
+    """Egy Streamlit oldal literál konstansa (pl. EVENT_TIME_FORMATS) az oldal futtatása nélkül."""
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(f"{name} nem található: {path}")
+
+
+# ====== Szintetikus adatok ======
+_DISTANCES = {
+    "800 Metres": 800, "1500 Metres": 1500, "3000 Metres": 3000, "5000 Metres": 5000,
+    "10000 Metres": 10000, "Half Marathon": 21097.5, "Marathon": 42195,
+}
+
+
+def synthetic_results(n_athletes: int, seed: int = 0) -> pd.DataFrame:
+    """Sportolónként 4–7 versenyszám, CS / D′ modellből zajjal generált időkkel (hosszú tábla)."""
+    rng = np.random.default_rng(seed)
+    events = np.array(list(_DISTANCES))
+    meters = np.array(list(_DISTANCES.values()))
+    counts = rng.integers(4, len(events) + 1, n_athletes)
+    athlete = np.repeat(np.arange(n_athletes), counts)
+    pick = np.concatenate([rng.permutation(len(events))[:c] for c in counts])
+    cs = rng.uniform(4.2, 6.2, n_athletes)[athlete]
+    dprime = rng.uniform(120, 350, n_athletes)[athlete]
+    d = meters[pick]
+    sec = (d - dprime) / cs * rng.normal(1.0, 0.01, len(d))
+    sec = np.where(d > 10000, d / cs * 1.04 ** np.log2(d / 10000), sec)  # hosszú távon lassulás
+    return pd.DataFrame({
+        "Athlete": [f"a{i:05d}" for i in athlete],
+        "Discipline": events[pick],
+        "Performance": [_format_time(s, "hh:mm:ss" if s >= 3600 else "mm:ss.ss") for s in sec],
+        "g": athlete, "s": sec, "m": d.astype(float),
+    })
+
+
+def _format_time(seconds: float, fmt: str) -> str:
+    if fmt == "ss.ss":
+        return f"{seconds:.2f}"
+    m, s = divmod(seconds, 60)
+    if fmt == "mm:ss.ss":
+        return f"{int(m)}:{s:05.2f}"
+    if fmt == "mm:ss":
+        return f"{int(m)}:{int(s):02d}"
+    h, m = divmod(int(m), 60)
+    return f"{h}:{m:02d}:{int(s):02d}"
+
+
+# tartomány (s) formátumonként, hogy valós időket kapjunk
+_FORMAT_RANGE = {"ss.ss": (6, 60), "mm:ss.ss": (60, 1800), "mm:ss": (800, 7200), "hh:mm:ss": (3600, 40000)}
+
+
+# ====== Ponttábla és WA pontok ======
+def _table():
+    from wa_scores import load_score_table
+    return load_score_table()
+
+
+@bench("score_table.load_artifact", "mmap artefaktum megnyitása (hideg betöltés)")
+def _load_artifact():
+    from wa_scores import WA_CSV, ScoreTable, artifact_is_fresh, artifact_path, build_artifact
+    if not artifact_is_fresh(WA_CSV):
+        build_artifact(WA_CSV)
+    art = artifact_path(WA_CSV)
+    return lambda: ScoreTable.from_artifact(art)
+
+
+@bench("score_table.load_csv", "ponttábla felépítése a CSV-ből (artefaktum nélkül)")
+def _load_csv():
+    from wa_scores import WA_CSV, ScoreTable
+    return lambda: ScoreTable.from_frame(pd.read_csv(WA_CSV))
+
+
+@bench("score_table.load_shared", "load_score_table() meleg, folyamatszintű cache-ből")
+def _load_shared():
+    from wa_scores import load_score_table
+    load_score_table()
+    return load_score_table
+
+
+@bench("wa_points.single", "egy pontlekérés (points_for)")
+def _points_single():
+    table = _table()
+    return lambda: table.points_for("Man", "5000 Metres", 842.3)
+
+
+@bench("wa_points.batch_100k", "100 000 eredmény pontozása (points_batch, vegyes nem és versenyszám)")
+def _points_batch():
+    table = _table()
+    df = synthetic_results(20000, seed=1).iloc[:100000]
+    gender = np.where(df["g"].to_numpy() % 2 == 0, "Man", "Woman")
+    events, seconds = df["Discipline"].to_numpy(), df["s"].to_numpy()
+    return lambda: table.points_batch(gender, events, seconds)
+
+
+@bench("wa_points.inverse_batch", "pont -> idő, 10 000 lekérés egy versenyszámra (seconds_batch)")
+def _points_inverse():
+    table = _table()
+    points = np.random.default_rng(2).uniform(300, 1300, 10000)
+    table.seconds_batch("Man", "5000 Metres", points[:1])
+    return lambda: table.seconds_batch("Man", "5000 Metres", points, interpolate=True)
+
+
+# a zárt alakú backend (WA_SCORE_BACKEND=formula) ugyanazokon a terheléseken
+def _model():
+    from wa_formula import ScoreModel
+    return ScoreModel.from_json()
+
+
+@bench("score_table.load_formula", "WA együtthatók betöltése JSON-ból, CSV hash ellenőrzéssel (ScoreModel)")
+def _load_formula():
+    from wa_formula import ScoreModel
+    return ScoreModel.from_json
+
+
+@bench("wa_points.formula_single", "egy pontlekérés a képletből (ScoreModel.points_for)")
+def _formula_single():
+    model = _model()
+    return lambda: model.points_for("Man", "5000 Metres", 842.3)
+
+
+@bench("wa_points.formula_batch_100k", "100 000 eredmény pontozása a képletből (ScoreModel.points_batch)")
+def _formula_batch():
+    model = _model()
+    df = synthetic_results(20000, seed=1).iloc[:100000]
+    gender = np.where(df["g"].to_numpy() % 2 == 0, "Man", "Woman")
+    events, seconds = df["Discipline"].to_numpy(), df["s"].to_numpy()
+    return lambda: model.points_batch(gender, events, seconds)
+
+
+@bench("wa_points.formula_inverse_batch", "pont -> idő, 10 000 lekérés a képletből (ScoreModel.seconds_batch)")
+def _formula_inverse():
+    model = _model()
+    points = np.random.default_rng(2).uniform(300, 1300, 10000)
+    return lambda: model.seconds_batch("Man", "5000 Metres", points)
+
+
+# ====== Időparszolás ======
+def _register_parse_benchmarks():
+    formats = page_constant(ROOT / "pages" / "02_AdatElemzes.py", "EVENT_TIME_FORMATS")
+
+    def setup_for(fmt):
+        def setup():
+            from time_parse import parse_performances
+            lo, hi = _FORMAT_RANGE[fmt]
+            sec = np.random.default_rng(3).uniform(lo, hi, PARSE_ROWS)
+            values = pd.Series([_format_time(s, fmt) for s in sec])
+            return lambda: parse_performances(values)
+        return setup
+
+    for fmt in sorted(set(formats.values())):
+        n_events = sum(f == fmt for f in formats.values())
+        bench(f"parse.{fmt}", f"{PARSE_ROWS} idő '{fmt}' formátumban ({n_events} versenyszám)")(setup_for(fmt))
+
+    @bench("parse.all_events", f"{PARSE_ROWS} idő az összes versenyszám formátumából, 5% jelöléssel (h, szél, DNF)")
+    def _parse_all():
+        from time_parse import parse_performances
+        rng = np.random.default_rng(4)
+        fmts = rng.choice(list(formats.values()), PARSE_ROWS)
+        values = [_format_time(rng.uniform(*_FORMAT_RANGE[f]), f) for f in fmts]
+        extra = ["h", " (+1.2)", "A", "*"]
+        for i in rng.choice(PARSE_ROWS, PARSE_ROWS // 20, replace=False):
+            values[i] = "DNF" if i % 7 == 0 else values[i] + extra[i % len(extra)]
+        values = pd.Series(values)
+        return lambda: parse_performances(values)
+
+
+_register_parse_benchmarks()
+
+
+# ====== CS és Riegel illesztés ======
+def _register_fit_benchmarks():
+    def fit_setup(model, n):
+        def setup():
+            from analysis import fit_critical_speed, riegel_fit
+            df = synthetic_results(n, seed=5)
+            g, s, m = df["g"].to_numpy(), df["s"].to_numpy(), df["m"].to_numpy()
+            if model == "riegel":
+                return lambda: riegel_fit(g, s, m, n_groups=n)
+            return lambda: fit_critical_speed(g, s, m, model=model, n_groups=n)
+        return setup
+
+    for n in FIT_SIZES:
+        bench(f"cs_fit.linear.{n}", f"CS lineáris illesztés, {n} sportoló")(fit_setup("linear", n))
+        bench(f"cs_fit.morton.{n}", f"CS 3-paraméteres illesztés, {n} sportoló")(fit_setup("morton", n))
+        bench(f"riegel_fit.{n}", f"Riegel k log–log illesztés, {n} sportoló")(fit_setup("riegel", n))
+
+    @bench("analyze_results.1000", "teljes elemzés 1000 sportolóra (parszolás, CS, Riegel, WA pont)")
+    def _analyze():
+        from analysis import analyze_results
+        df = synthetic_results(1000, seed=6)[["Athlete", "Discipline", "Performance"]]
+        table = _table()
+        return lambda: analyze_results(df, score_table=table)
+
+
+_register_fit_benchmarks()
+
+
+# ====== PB tábla feldolgozás ======
+def _register_pb_benchmarks():
+    def setup_for(path):
+        def setup():
+            from get_pb import parse_pb_page
+            html = path.read_text(encoding="utf-8")
+            if not parse_pb_page(html):
+                raise RuntimeError(f"A fixture nem ad PB sort: {path.name}")
+            return lambda: parse_pb_page(html)
+        return setup
+
+    for path in sorted((ROOT / "fixtures" / "wa").glob("*.html")):
+        bench(f"pb_parse.{path.stem}", f"parse_pb_page a {path.name} fixture-ön")(setup_for(path))
+
+
+_register_pb_benchmarks()
+
+
+_FIXTURE_SERVER = {}
+
+
+def _fixture_base_url() -> str:
+    """A lokális WA fixture szerver (folyamatonként egy, háttérszálon)."""
+    if "base" not in _FIXTURE_SERVER:
+        from wa_fixture_server import serve
+        _FIXTURE_SERVER["server"], _FIXTURE_SERVER["base"] = serve()
+    return _FIXTURE_SERVER["base"]
+
+
+def _register_pb_http_benchmarks():
+    def setup_for(path):
+        def setup():
+            import requests
+            from get_pb import fetch_pbs_http, get_personal_bests, parse_pb_page
+            url = f"{_fixture_base_url()}/athletes/hungary/{path.stem}"
+            # a teljes HTTP út (kérés, státusz, kódolás) ugyanazt adja, mint a fájl feldolgozása
+            expected = parse_pb_page(path.read_text(encoding="utf-8"))
+            if fetch_pbs_http(url) != expected or get_personal_bests(url) != expected:
+                raise RuntimeError(f"A HTTP út eltér a fixture feldolgozásától: {path.name}")
+            try:
+                fetch_pbs_http(f"{_fixture_base_url()}/athletes/hungary/nincs-ilyen")
+            except requests.HTTPError:
+                pass
+            else:
+                raise RuntimeError("A 404-es válasz nem dobott hibát.")
+            return lambda: fetch_pbs_http(url)
+        return setup
+
+    for path in sorted((ROOT / "fixtures" / "wa").glob("*.html")):
+        bench(f"pb_http.{path.stem}", f"fetch_pbs_http a fixture szerveren ({path.name}, keep-alive)")(setup_for(path))
+
+
+_register_pb_http_benchmarks()
+
+
+# ====== Streamlit oldalak rerunja ======
+def _sample_idok() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Versenyszám": ["800 Metres", "1500 Metres", "3000 Metres", "5000 Metres", "10000 Metres",
+                        "10 Kilometres Road", "Half Marathon"],
+        "Idő": ["1:54.20", "3:58.40", "8:35.10", "14:55.30", "31:02.00", "31:40", "1:09:30"],
+        "Dátum": ["2025-05-01", "2025-05-20", "2025-06-03", "2025-06-21", "2025-07-10", "2025-09-14", "2025-10-05"],
+        "Gender": ["Man"] * 7,
+    })
+
+
+def _apptest(page: str, state: dict | None = None):
+    from streamlit import config, logger
+    from streamlit.testing.v1 import AppTest
+
+    # a deprecációs és ScriptRunContext figyelmeztetések ne keveredjenek az eredménytáblába
+    config.set_option("logger.level", "error")
+    logger.set_log_level("error")
+    at = AppTest.from_file(str(ROOT / page), default_timeout=60)
+    for key, value in (state or {}).items():
+        at.session_state[key] = value
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].message}")
+    return at.run
+
+
+@bench("rerun.streamlit_v3", "a főoldal teljes rerunja (AppTest)")
+def _rerun_main():
+    return _apptest("streamlit_v3.py", {"idok": _sample_idok()})
+
+
+@bench("rerun.elemzes_cs", "az elemző oldal rerunja, CS tab, 5 kijelölt eredmény (AppTest)")
+def _rerun_cs():
+    return _apptest("pages/02_AdatElemzes.py",
+                    {"idok": _sample_idok(), "gender": "Man", "cs_sel": {0, 1, 2, 3, 4}})
+
+
+@bench("rerun.elemzes_wa", "az elemző oldal rerunja, WA tab (AppTest)")
+def _rerun_wa():
+    return _apptest("pages/02_AdatElemzes.py",
+                    {"idok": _sample_idok(), "gender": "Man", "elemzes_tab": "🏅 WA Score"})
+
+
+# ====== Baseline ======
+def _meta() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def load_baseline(path: Path = BASELINE) -> dict:
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("results", {})
+
+
+def save_baseline(results: dict, path: Path = BASELINE) -> None:
+    """A futtatott mérések felülírják a baseline megfelelő bejegyzéseit (a többi marad)."""
+    merged = load_baseline(path)
+    merged.update({name: {k: r[k] for k in ("best_s", "median_s", "rel")} for name, r in results.items()})
+    path.write_text(json.dumps({"meta": _meta(), "results": dict(sorted(merged.items()))},
+                               indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def _fmt(sec: float) -> str:
+    for unit, mult in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if sec * mult >= 1:
+            return f"{sec * mult:8.2f} {unit}"
+    return f"{sec * 1e9:8.0f} ns"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Offline benchmark a pontozás, parszolás, illesztés és PB feldolgozás útjaira.")
+    ap.add_argument("-k", dest="patterns", action="append", default=[],
+                    help="csak a nevében ezt tartalmazó mérések (többször is megadható)")
+    ap.add_argument("--list", action="store_true", help="a mérések listája futtatás nélkül")
+    ap.add_argument("--update", action="store_true", help="a baseline felülírása a mostani eredményekkel")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--json", type=Path, help="az eredmények mentése ide (JSON)")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="lassulás, ha (referenciához viszonyított) legjobb idő > baseline × tolerancia (alap: %(default)s)")
+    ap.add_argument("--repeat", type=int, default=REPEAT)
+    args = ap.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if not args.patterns or any(p in n for p in args.patterns)]
+    if args.list:
+        for name in names:
+            print(f"{name:<32} {BENCHMARKS[name][0]}")
+        return 0
+
+    limit = args.tolerance * float(os.environ.get("WA_BENCH_SCALE", "1"))
+    baseline = {} if args.update else load_baseline(args.baseline)
+    results, regressions, errors = {}, [], []
+    for name in names:
+        base = baseline.get(name)
+        try:
+            fn = BENCHMARKS[name][1]()
+            res = run_benchmark(fn, repeat=args.repeat)
+            for _ in range(RETRIES if base else 0):
+                if _ratio(res, base) <= limit:
+                    break
+                again = run_benchmark(fn, repeat=args.repeat)
+                res = min(res, again, key=lambda x: _ratio(x, base))
+        except Exception as e:
+            errors.append(name)
+            print(f"HIBA  {name:<32} {type(e).__name__}: {e}")
+            continue
+        results[name] = res
+        if base is None:
+            status, ratio = "ÚJ  ", ""
+        else:
+            r = _ratio(res, base)
+            status = "LASS" if r > limit else "OK  "
+            ratio = f"  ×{r:.2f}"
+            if r > limit:
+                regressions.append((name, r))
+        print(f"{status}  {name:<32} {_fmt(res['best_s'])}  (medián {_fmt(res['median_s']).strip()}){ratio}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"meta": _meta(), "results": results}, indent=2, ensure_ascii=False) + "\n",
+                             encoding="utf-8")
+    if args.update:
+        save_baseline(results, args.baseline)
+        print(f"Baseline frissítve: {args.baseline} ({len(results)} mérés)")
+        return 1 if errors else 0
+    if regressions:
+        print(f"\nLASSULÁS a baseline-hoz képest (tolerancia ×{limit:.2f}):", file=sys.stderr)
+        for name, r in regressions:
+            print(f"  {name}: ×{r:.2f}", file=sys.stderr)
+    return 1 if regressions or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
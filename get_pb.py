@@ -1,15 +1,41 @@
 # get_pb.py
+import atexit
+import contextlib
+import json
+import os
+import queue
+import re
+import socket
+import threading
+from html.parser import HTMLParser
+
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import requests
+from pb_cache import get_pb_cache
+from requests.adapters import HTTPAdapter
+
+# a selenium csak a böngészős (fallback) úton töltődik be, az oldalindítást nem lassítja
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+def _free_port() -> int:
+    """Szabad lokális port a remote debugginghoz (párhuzamos driverek ne ütközzenek)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
 
 
-def _make_driver():
+def _make_driver(debug_port: int | None = None):
     """Headless Chromium driver a Streamlit Cloudhoz (extra opciókkal)."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
     options = Options()
     options.binary_location = "/usr/bin/chromium"
     options.add_argument("--headless=old")  # próbáljuk a stabilabb headless módot
@@ -21,20 +47,244 @@ def _make_driver():
     options.add_argument("--disable-background-networking")
     options.add_argument("--disable-sync")
     options.add_argument("--disable-translate")
-    options.add_argument("--remote-debugging-port=9222")
+    options.add_argument(f"--remote-debugging-port={debug_port or _free_port()}")
     options.add_argument("--window-size=1366,900")
     options.add_argument("--lang=en-US")
-    options.add_argument(
-        "--user-agent=Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
+    options.add_argument(f"--user-agent={USER_AGENT}")
 
     driver_path = "/usr/bin/chromedriver"
     return webdriver.Chrome(service=Service(driver_path), options=options)
 
 
-def scrape_world_athletics_pbs(url: str, wait_sec: int = 45):
+# ====== Driver pool ======
+class DriverPool:
+    """
+    Korlátos méretű, hosszú életű WebDriver pool.
+
+    `checkout()` context managerrel kérünk ki drivert; ha mind foglalt, várunk
+    (legfeljebb `timeout` mp-ig). Kiadás előtt health check fut, és minden
+    driver `max_pages` oldal után újraindul, hogy a Chromium memóriája ne nőjön.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 25, factory=_make_driver):
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _healthy(driver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _acquire_driver(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._factory()
+                with self._lock:
+                    self._pages[id(driver)] = 0
+                return driver
+            if self._healthy(driver):
+                return driver
+            self._discard(driver)
+
+    @contextlib.contextmanager
+    def checkout(self, timeout: float | None = 120):
+        if self._closed:
+            raise RuntimeError("A driver pool már le van zárva.")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Nincs szabad böngésző a poolban.")
+        driver = None
+        broken = False
+        try:
+            driver = self._acquire_driver()
+            yield driver
+        except Exception:
+            broken = driver is not None and not self._healthy(driver)
+            raise
+        finally:
+            try:
+                if driver is not None:
+                    self._release(driver, broken)
+            finally:
+                self._slots.release()
+
+    def _release(self, driver, broken: bool):
+        with self._lock:
+            used = self._pages.get(id(driver), 0) + 1
+            self._pages[id(driver)] = used
+        if broken or self._closed or used >= self.max_pages:
+            self._discard(driver)
+            return
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        except Exception:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Folyamatonként egy közös pool (méret: WA_DRIVER_POOL_SIZE, újraindítás: WA_DRIVER_MAX_PAGES)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = DriverPool(
+                size=int(os.environ.get("WA_DRIVER_POOL_SIZE", "2")),
+                max_pages=int(os.environ.get("WA_DRIVER_MAX_PAGES", "25")),
+            )
+            atexit.register(_POOL.close)
+        return _POOL
+
+
+# ====== PB tábla feldolgozás (Selenium és HTTP közös) ======
+def _rows_from_table(headers: list[str], cells: list[list[str]]) -> list[dict]:
+    """PB tábla szöveges cellái -> list[dict] (Discipline, Performance, Date, Score)."""
+    headers_lower = [h.lower() for h in headers]
+    score_idx = headers_lower.index("score") if "score" in headers_lower else None
+    rows_out = []
+    for tds in cells:
+        if len(tds) < 2:
+            continue
+        disc, perf = tds[0], tds[1]
+        date = None
+        score = None
+
+        if len(tds) >= 4:
+            maybe_date = tds[3]
+            date = maybe_date if any(ch.isdigit() for ch in maybe_date) else None
+        elif len(tds) >= 3:
+            maybe_date = tds[2]
+            date = maybe_date if any(ch.isdigit() for ch in maybe_date) else None
+
+        if score_idx is not None and score_idx < len(tds):
+            score = tds[score_idx]
+
+        if disc and perf:
+            rows_out.append({
+                "Discipline": disc,
+                "Performance": perf,
+                "Date": date,
+                "Score": score
+            })
+    return rows_out
+
+
+class _TableParser(HTMLParser):
+    """
+    Minimális HTML tábla-kigyűjtő: táblánként (fejlécek, cellasorok). A sor- és
+    cellaállapot táblánként külön veremszinten van, így egy cellába ágyazott tábla
+    szövege nem kerül a külső tábla cellájába, és a külső sort sem zárja le.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._stack = []  # táblánként: {"headers", "rows", "row", "cell"}
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._stack.append({"headers": [], "rows": [], "row": None, "cell": None})
+            return
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if tag == "tr":
+            top["row"], top["cell"] = [], None
+        elif tag in ("td", "th") and top["row"] is not None:
+            top["cell"] = (tag, [])
+
+    def handle_endtag(self, tag):
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if tag in ("td", "th") and top["cell"] is not None:
+            kind, parts = top["cell"]
+            top["row"].append((kind, " ".join("".join(parts).split())))
+            top["cell"] = None
+        elif tag == "tr" and top["row"] is not None:
+            row = top["row"]
+            if row and all(kind == "th" for kind, _ in row) and not top["headers"]:
+                top["headers"].extend(text for _, text in row)
+            elif any(kind == "td" for kind, _ in row):
+                top["rows"].append([text for kind, text in row if kind == "td"])
+            top["row"] = None
+        elif tag == "table":
+            done = self._stack.pop()
+            self.tables.append((done["headers"], done["rows"]))
+
+    def handle_data(self, data):
+        # csak a legbelső tábla aktuális cellája kapja a szöveget
+        if self._stack and self._stack[-1]["cell"] is not None:
+            self._stack[-1]["cell"][1].append(data)
+
+
+def _pb_rows_from_html_table(html: str, any_table: bool = False) -> list[dict]:
+    """
+    Az első Discipline / Performance fejlécű tábla sorai. `any_table=True` esetén
+    ilyen híján a legkülső tábla (a Selenium úton már a kiválasztott tábla HTML-jét kapjuk).
+    """
+    parser = _TableParser()
+    parser.feed(html)
+    for headers, cells in parser.tables:
+        if "Discipline" in headers and any("Performance" in h for h in headers):
+            return _rows_from_table(headers, cells)
+    if any_table and parser.tables:
+        headers, cells = parser.tables[-1]  # a beágyazott táblák előbb zárulnak, a külső az utolsó
+        return _rows_from_table(headers, cells)
+    return []
+
+
+def _normalize_pb_rows(rows_out: list[dict]) -> list[dict]:
+    if not rows_out:
+        return []
+
+    # ---- Normalizálás Pandas-szal
+    df = pd.DataFrame(rows_out)
+    for c in ["Discipline", "Performance", "Date", "Score"]:
+        if c not in df.columns:
+            df[c] = None
+
+    df["Performance"] = df["Performance"].astype(str).str.replace(",", ".", regex=False)
+
+    # egy vektorizált hívás; a "mixed" formátum elemenként ugyanúgy értelmez, mint a soronkénti to_datetime
+    dates = pd.to_datetime(df["Date"].astype(object), errors="coerce", format="mixed")
+    df["Date"] = [d.date().isoformat() if pd.notna(d) else None for d in dates]
+    df = df[~df["Discipline"].isna() & df["Performance"].astype(str).str.len().gt(0)]
+
+    return df.to_dict(orient="records")
+
+
+def scrape_world_athletics_pbs(url: str, wait_sec: int = 45, pool: DriverPool | None = None):
     """
     WA profil Personal Bests fül scraping.
     Visszatérés: list[dict] kulcsokkal: Discipline, Performance, Date, Score
@@ -42,8 +292,12 @@ def scrape_world_athletics_pbs(url: str, wait_sec: int = 45):
     if not isinstance(url, str) or not url.strip():
         return []
 
-    driver = _make_driver()
-    try:
+    from selenium.common.exceptions import StaleElementReferenceException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    with (pool or get_driver_pool()).checkout() as driver:
         driver.get(url)
         WebDriverWait(driver, wait_sec).until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
@@ -74,65 +328,115 @@ def scrape_world_athletics_pbs(url: str, wait_sec: int = 45):
             ))
         )
 
-        rows_out = []
-        rows = table.find_elements(By.XPATH, ".//tr")
-        if len(rows) > 1:
-            headers = [th.text.strip() for th in rows[0].find_elements(By.TAG_NAME, "th")]
-            for r in rows[1:]:
-                tds = r.find_elements(By.TAG_NAME, "td")
-                if len(tds) < 2:
-                    continue
-                disc = tds[0].text.strip()
-                perf = tds[1].text.strip()
-                date = None
-                score = None
-
-                if len(tds) >= 4:
-                    maybe_date = tds[3].text.strip()
-                    date = maybe_date if any(ch.isdigit() for ch in maybe_date) else None
-                elif len(tds) >= 3:
-                    maybe_date = tds[2].text.strip()
-                    date = maybe_date if any(ch.isdigit() for ch in maybe_date) else None
-
-                headers_lower = [h.lower() for h in headers]
-                if "score" in headers_lower:
-                    try:
-                        idx = headers_lower.index("score")
-                        if idx < len(tds):
-                            score = tds[idx].text.strip()
-                    except Exception:
-                        score = None
-
-                if disc and perf:
-                    rows_out.append({
-                        "Discipline": disc,
-                        "Performance": perf,
-                        "Date": date,
-                        "Score": score
-                    })
-
-        if not rows_out:
-            return []
-
-        # ---- Normalizálás Pandas-szal
-        df = pd.DataFrame(rows_out)
-        for c in ["Discipline", "Performance", "Date", "Score"]:
-            if c not in df.columns:
-                df[c] = None
-
-        df["Performance"] = df["Performance"].astype(str).str.replace(",", ".", regex=False)
-
-        def _to_iso(x):
-            try:
-                d = pd.to_datetime(x, errors="coerce")
-                return d.date().isoformat() if pd.notna(d) else None
-            except Exception:
-                return None
+        # egyetlen WebDriver hívás: a renderelt tábla HTML-je, a feldolgozás helyben fut
+        # (cellánkénti find_elements / .text helyett, ami cellánként egy-egy RPC)
+        try:
+            rows = _pb_rows_from_html_table(table.get_attribute("outerHTML"), any_table=True)
+        except StaleElementReferenceException:
+            # a tábla közben újrarenderelődött: a teljes oldalforrásból keressük ki
+            rows = _pb_rows_from_html_table(driver.page_source)
+        return _normalize_pb_rows(rows)
+
+
+# ====== Böngésző nélküli (HTTP) út ======
+_HTTP = threading.local()
+_NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
 
-        df["Date"] = df["Date"].apply(_to_iso)
-        df = df[~df["Discipline"].isna() & df["Performance"].astype(str).str.len().gt(0)]
+def _http_session() -> requests.Session:
+    """Szálanként egy keep-alive session, így a kapcsolatok újrahasznosulnak."""
+    sess = getattr(_HTTP, "session", None)
+    if sess is None:
+        sess = requests.Session()
+        sess.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=1)
+        sess.mount("https://", adapter)
+        sess.mount("http://", adapter)
+        _HTTP.session = sess
+    return sess
 
-        return df.to_dict(orient="records")
 
-    finally:
-        driver.quit()
+def _find_pb_results(obj):
+    """A __NEXT_DATA__ JSON-ban a personalBests eredménylista megkeresése (rekurzívan)."""
+    if isinstance(obj, dict):
+        pbs = obj.get("personalBests")
+        if isinstance(pbs, dict) and isinstance(pbs.get("results"), list):
+            return pbs["results"]
+        if isinstance(pbs, list):
+            return pbs
+        for v in obj.values():
+            found = _find_pb_results(v)
+            if found is not None:
+                return found
+    elif isinstance(obj, list):
+        for v in obj:
+            found = _find_pb_results(v)
+            if found is not None:
+                return found
+    return None
+
+
+def _pb_rows_from_next_data(html: str) -> list[dict]:
+    m = _NEXT_DATA_RE.search(html)
+    if not m:
+        return []
+    results = _find_pb_results(json.loads(m.group(1))) or []
+    rows_out = []
+    for r in results:
+        if not isinstance(r, dict):
+            continue
+        disc = str(r.get("discipline") or "").strip()
+        perf = str(r.get("mark") or "").strip()
+        score = r.get("resultScore")
+        if disc and perf:
+            rows_out.append({
+                "Discipline": disc,
+                "Performance": perf,
+                "Date": r.get("date"),
+                "Score": str(score) if score not in (None, "") else None,
+            })
+    return rows_out
+
+
+def parse_pb_page(html: str) -> list[dict]:
+    """Profiloldal HTML -> normalizált PB sorok (előbb a beágyazott JSON, aztán a tábla)."""
+    rows = _pb_rows_from_next_data(html) or _pb_rows_from_html_table(html)
+    return _normalize_pb_rows(rows)
+
+
+def fetch_pbs_http(url: str, timeout: float = 15, session: requests.Session | None = None) -> list[dict]:
+    """PB-k lekérése böngésző nélkül, egyetlen HTTP kéréssel."""
+    if not isinstance(url, str) or not url.strip():
+        return []
+    resp = (session or _http_session()).get(url.strip(), timeout=timeout)
+    resp.raise_for_status()
+    return parse_pb_page(resp.text)
+
+
+def get_personal_bests(url: str, wait_sec: int = 45, http_first: bool = True,
+                       selenium_slots: threading.Semaphore | None = None) -> list[dict]:
+    """
+    PB-k betöltése: először a gyors HTTP úton, és csak ha az nem ad eredményt
+    (hálózati hiba, megváltozott oldalszerkezet), akkor a Selenium úton.
+    `selenium_slots`: ha meg van adva, a Selenium ág ezen keresztül fut (a hívó így a
+    párhuzamos böngészős letöltéseket a driver pool méretére korlátozhatja).
+    """
+    if http_first:
+        try:
+            rows = fetch_pbs_http(url, timeout=min(wait_sec, 15))
+        except Exception:
+            rows = []
+        if rows:
+            return rows
+    with selenium_slots or contextlib.nullcontext():
+        return scrape_world_athletics_pbs(url, wait_sec=wait_sec)
+
+
+def get_personal_bests_cached(url: str, wait_sec: int = 45, force: bool = False) -> tuple[list[dict], str]:
+    """
+    Mint a `get_personal_bests`, de a tartós PB cache-en keresztül.
+    Visszatérés: (rows, forrás) – forrás: 'cache', 'stale' (háttérben frissül), 'fresh'
+    vagy 'stale-error' (a frissítés nem sikerült, korábban mentett adat). Mentett adat
+    nélkül a letöltési hiba kivételként jön vissza.
+    """
+    return get_pb_cache().fetch(url, lambda u: get_personal_bests(u, wait_sec=wait_sec), force=force)
@@ -0,0 +1,87 @@
+# import_budget.py
+"""
+Indulási import-költség mérése és keretszámai oldalanként.
+
+Minden oldal legfelső szintű importjait (amit az első kirajzolás előtt mindenképp
+betölt) egy friss Python folyamatban, `-X importtime`-mal mérjük. Hiba, ha:
+  - az importok összideje túllépi az oldal keretét, vagy
+  - egy "nehéz" csomag (matplotlib, scipy, selenium, reportlab) már induláskor betöltődik.
+
+    python import_budget.py            # táblázat + kilépési kód (0 = keretben)
+    python import_budget.py --top 15   # a 15 legdrágább modul is
+
+A keret (ms) a WA_IMPORT_BUDGET_SCALE szorzóval lazítható lassú gépeken.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# oldal -> keret ms-ban (streamlit + pandas + numpy önmagában ~1 s egy kis cloud gépen)
+BUDGETS_MS = {
+    "streamlit_v3.py": 1800,
+    "01_AdatBetoltes.py": 1500,
+    "pages/02_AdatElemzes.py": 1600,
+}
+HEAVY = ("matplotlib", "scipy", "selenium", "reportlab")
+
+
+def top_level_imports(path: Path) -> list[str]:
+    """A modul legfelső szintjén álló import utasítások forrása (függvényeken / tabokon belüliek nem)."""
+    src = path.read_text(encoding="utf-8")
+    tree = ast.parse(src)
+    return [ast.get_source_segment(src, node) for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def measure(path: Path) -> dict:
+    """Friss folyamatban lefuttatja az importokat; (összidő ms, modulonkénti idők, betöltött nehéz csomagok)."""
+    code = "\n".join(top_level_imports(path)) + (
+        "\nimport sys\nprint('HEAVY=' + ','.join(sorted({m.split('.')[0] for m in sys.modules} & set(%r))))"
+        % (HEAVY,)
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    per_module = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        per_module[name.strip()] = (int(self_us), int(cum_us), depth)
+    total_ms = sum(self_us for self_us, _, _ in per_module.values()) / 1000
+    heavy = [h for h in proc.stdout.strip().removeprefix("HEAVY=").split(",") if h]
+    return {"total_ms": total_ms, "modules": per_module, "heavy": heavy}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Oldalankénti indulási import-idő keretek ellenőrzése.")
+    ap.add_argument("--top", type=int, default=0, help="a legdrágább N modul kiírása oldalanként")
+    args = ap.parse_args(argv)
+    scale = float(os.environ.get("WA_IMPORT_BUDGET_SCALE", "1"))
+
+    failed = False
+    for page, budget in BUDGETS_MS.items():
+        res = measure(ROOT / page)
+        limit = budget * scale
+        ok = res["total_ms"] <= limit and not res["heavy"]
+        failed |= not ok
+        extra = f"  nehéz csomag induláskor: {', '.join(res['heavy'])}" if res["heavy"] else ""
+        print(f"{'OK ' if ok else 'HIBA'} {page:<26} {res['total_ms']:7.0f} ms / {limit:.0f} ms{extra}")
+        if args.top:
+            # csak a felső szintű (közvetlenül importált) csomagok kumulatív ideje
+            top = min(depth for _, _, depth in res["modules"].values())
+            roots = sorted(((cum, name) for name, (_, cum, depth) in res["modules"].items() if depth == top),
+                           reverse=True)[:args.top]
+            for cum, name in roots:
+                print(f"       {cum / 1000:7.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,21 @@
-import math
-import os
-from pathlib import Path
+import functools
 
 import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+
+from analysis import (CS_MODELS, CS_ZONES, DEFAULT_TARGETS, EVENT_TO_METERS, fit_critical_speed,
+                      recency_weights, riegel_fit, riegel_predict_grid)
+from plots import cs_plot
+from profiler import page_profiler
+from report import build_report
+from results_store import session_store
+from time_parse import to_seconds
+from wa_scores import load_score_table, score_table_version
 
 # -------------------- Oldal beállítás --------------------
 st.set_page_config(page_title="Adatelemzés", page_icon="📊", layout="wide")
+prof = page_profiler("Adatelemzés")  # WA_PROFILE=1 vagy ?profile=1
 
 # -------------------- Események és távok --------------------
 EVENT_TIME_FORMATS = {
@@ -36,23 +43,6 @@ EVENT_TIME_FORMATS = {
 }
 EVENT_OPTIONS = list(EVENT_TIME_FORMATS.keys())
 
-EVENT_TO_METERS = {
-    "50 Metres": 50, "55 Metres": 55, "60 Metres": 60, "100 Metres": 100,
-    "200 Metres": 200, "200 Metres Short Track": 200, "300 Metres": 300,
-    "300 Metres Short Track": 300, "400 Metres": 400, "400 Metres Short Track": 400,
-    "500 Metres": 500, "500 Metres Short Track": 500, "600 Metres": 600,
-    "600 Metres Short Track": 600, "800 Metres": 800, "800 Metres Short Track": 800,
-    "1000 Metres": 1000, "1000 Metres Short Track": 1000, "1500 Metres": 1500,
-    "1500 Metres Short Track": 1500, "Mile": 1609.34, "Mile Short Track": 1609.34,
-    "2000 Metres": 2000, "2000 Metres Short Track": 2000, "3000 Metres": 3000,
-    "3000 Metres Short Track": 3000, "2 Miles": 3218.68, "2 Miles Short Track": 3218.68,
-    "5000 Metres": 5000, "5000 Metres Short Track": 5000, "10000 Metres": 10000,
-    "5 Kilometres Road": 5000, "10 Kilometres Road": 10000, "15 Kilometres Road": 15000,
-    "20 Kilometres Road": 20000, "25 Kilometres Road": 25000, "30 Kilometres Road": 30000,
-    "10 Miles Road": 16093.4, "Half Marathon": 21097.5, "Marathon": 42195,
-    "100 Kilometres Road": 100000,
-}
-
 # -------------------- Helper függvények --------------------
 # === Infóbox stílus + helper ===
 def _inject_info_styles():
@@ -103,21 +93,6 @@ def info_box(title: str, html_body: str, icon: str = "ℹ️"):
     )
 
 
-def time_to_seconds(txt: str) -> float:
-    if not isinstance(txt, str) or not txt.strip():
-        return np.nan
-    parts = txt.strip().split(":")
-    try:
-        if len(parts) == 1:
-            return float(parts[0])
-        elif len(parts) == 2:
-            return int(parts[0]) * 60 + float(parts[1])
-        elif len(parts) == 3:
-            return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-    except Exception:
-        return np.nan
-    return np.nan
-
 def seconds_to_mmss(sec: float) -> str:
     if not np.isfinite(sec) or sec <= 0:
         return "-"
@@ -140,40 +115,192 @@ def seconds_to_mmss_per_km(sec_per_km: float) -> str:
     s = int(round(sec_per_km - m * 60))
     return f"{m}:{s:02d}/km"
 
-# -------------------- Kártyás választó --------------------
-def result_cards_selector(df, key_prefix, max_select=None, ncols=8):
-    selected = []
-    df = df.reset_index()
-    for i in range(0, len(df), ncols):
-        cols = st.columns(ncols, gap="small")
-        for j in range(ncols):
-            if i + j >= len(df):
-                break
-            row = df.iloc[i + j]
-            with cols[j].container(border=True):
-                st.caption(f"**{row['Versenyszám']}**")
-                st.caption(row["Idő"])
-                checked = st.checkbox(" ", key=f"{key_prefix}_{row['index']}")
-                if checked:
-                    selected.append(row["index"])
+# -------------------- Riegel előrejelzés (cache-elve) --------------------
+RIEGEL_DISTANCES = sorted(set(EVENT_TO_METERS.values()))
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def riegel_grid(seconds: tuple, meters: tuple, window: tuple):
+    """k illesztés + várható idő az összes versenyszámra egy hívásban, az eredményhalmazra cache-elve."""
+    s = np.asarray(seconds, dtype=float)
+    m = np.asarray(meters, dtype=float)
+    inside = (m >= window[0]) & (m <= window[1])
+    s, m = s[inside], m[inside]
+    g = np.zeros(len(s), dtype=int)
+    fit = riegel_fit(g, s, m, 1).iloc[0].to_dict()
+    pred, ref_m, ref_s = riegel_predict_grid(g, s, m, [fit["k"]], list(EVENT_TO_METERS.values()), 1)
+    grid = pd.DataFrame({
+        "Táv (m)": list(EVENT_TO_METERS.values()),
+        "Várható idő (s)": pred[0],
+        "Ref táv (m)": ref_m[0],
+        "Ref idő (s)": ref_s[0],
+    }, index=pd.Index(list(EVENT_TO_METERS), name="Versenyszám"))
+    return fit, grid
+
+
+# -------------------- WA egyenértékű idők (cache-elve) --------------------
+def format_result(sec: float) -> str:
+    """Versenyeredmény formátum: ss.ss, m:ss.ss vagy h:mm:ss."""
+    if not np.isfinite(sec) or sec <= 0:
+        return "-"
+    if sec < 60:
+        return f"{sec:.2f}"
+    if sec < 3600:
+        m = int(sec // 60)
+        return f"{m}:{sec - m * 60:05.2f}"
+    return seconds_to_hms(sec)
+
+
+def event_category(event: str) -> str:
+    if "Road" in event or event in ("Half Marathon", "Marathon"):
+        return "Országúti"
+    return "Fedett" if "Short Track" in event else "Szabadtéri"
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def wa_equivalence(table_version: int, gender: str, points: float) -> pd.DataFrame:
+    """
+    A pontszámhoz tartozó idő minden versenyszámban (egy inverz keresés), pontértékenként cache-elve.
+    A `table_version` csak a cache kulcs része: a ponttábla újratöltése után új értéket ad.
+    """
+    secs = load_score_table().equivalent_times(gender, [points])[points]
+    secs = secs.loc[sorted(secs.index, key=lambda e: (EVENT_TO_METERS.get(e, float("inf")), e))]
+    return pd.DataFrame({
+        "Kategória": [event_category(e) for e in secs.index],
+        "Idő (s)": secs.to_numpy(),
+        "Idő": [format_result(v) for v in secs.to_numpy()],
+    }, index=secs.index)
+
+
+def report_pdf(export: dict, gender: str) -> bytes:
+    """PDF riport a tabok által eltett eredményekből (ami még nincs kiszámolva, kimarad)."""
+    wa = export.get("wa_results")
+    return build_report({
+        "athlete": "Futó teljesítmény riport",
+        "gender": gender,
+        "cs": export.get("cs_result"),
+        "riegel": export.get("riegel_result"),
+        "wa": list(wa[["Versenyszám", "Idő", "WA pont"]].itertuples(index=False, name=None))
+              if wa is not None else None,
+    })
+
+
+# -------------------- Eredmény választó --------------------
+def result_selector(df, key_prefix, max_select=None, columns=("Versenyszám", "Idő", "Dátum"), height=300):
+    """
+    Táblázatos többes kijelölő: szűrők + egyetlen data_editor, így a widgetek száma és
+    a rajzolási idő nem nő az eredmények számával. A kijelölés a stabil azonosítókon
+    (df index) él a sessionben, szűrés és tabváltás után is megmarad.
+    Visszatérés: a kijelölt indexek a df sorrendjében.
+    """
+    ss = st.session_state
+    base_key, ver_key, live_key = f"{key_prefix}_sel", f"{key_prefix}_sel_ver", f"{key_prefix}_sel_live"
+    base = ss.setdefault(base_key, set())
+    base &= set(df.index)  # törölt eredmények kiesnek
+
+    def commit(new_editor=True):
+        # a látható táblán tett kattintások átírása az alap halmazba (idempotens, így minden
+        # szerkesztés után is futhat: a tabváltáskor törlődő szerkesztő állapota nem vész el);
+        # szűrés / gomb után új szerkesztő indul
+        live = ss.get(live_key)
+        if live:
+            editor_key, ids = live
+            for pos, change in (ss.get(editor_key) or {}).get("edited_rows", {}).items():
+                if "✓" in change:
+                    (base.add if change["✓"] else base.discard)(ids[int(pos)])
+        if new_editor:
+            ss[ver_key] = ss.get(ver_key, 0) + 1
+
+    def set_all(ids, on):
+        commit()
+        if on:
+            base.update(ids)
+        else:
+            base.difference_update(ids)
+
+    fcol1, fcol2 = st.columns([2, 1])
+    events = sorted(df["Versenyszám"].dropna().unique(), key=lambda e: EVENT_TO_METERS.get(e, float("inf")))
+    ev_filter = fcol1.multiselect("Versenyszám", events, key=f"{key_prefix}_f_event",
+                                  placeholder="Összes versenyszám", on_change=commit)
+    mask = df["Versenyszám"].isin(ev_filter).to_numpy() if ev_filter else np.ones(len(df), bool)
+    dates = pd.to_datetime(df["Dátum"], errors="coerce") if "Dátum" in df else pd.Series(pd.NaT, index=df.index)
+    if dates.notna().any():
+        lo, hi = dates.min().date(), dates.max().date()
+        rng = fcol2.date_input("Időszak", value=(lo, hi), min_value=lo, max_value=hi,
+                               key=f"{key_prefix}_f_date", on_change=commit)
+        if isinstance(rng, (tuple, list)) and len(rng) == 2 and (rng[0] > lo or rng[1] < hi):
+            mask &= ((dates.dt.date >= rng[0]) & (dates.dt.date <= rng[1])).to_numpy()
+
+    view = df.loc[mask, [c for c in columns if c in df.columns]]
+    view.insert(0, "✓", view.index.isin(base))
+    # a szerkesztő állapota pozíció alapú: más sorhalmazhoz új kulcs tartozik
+    editor_key = f"{key_prefix}_editor_{ss.get(ver_key, 0)}_{hash(tuple(view.index))}"
+    edited = st.data_editor(
+        view, key=editor_key, hide_index=True, use_container_width=True,
+        height=min(height, 35 * (len(view) + 1) + 3),
+        disabled=[c for c in view.columns if c != "✓"],
+        column_config={"✓": st.column_config.CheckboxColumn(" ", width="small")},
+        on_change=commit, args=(False,),
+    )
+    ss[live_key] = (editor_key, view.index.tolist())
+    selected = (base - set(view.index)) | set(edited.index[edited["✓"].to_numpy(dtype=bool)])
+
+    bcol1, bcol2, bcol3 = st.columns([1, 1, 3])
+    bcol1.button("Mind", key=f"{key_prefix}_all", on_click=set_all, args=(view.index.tolist(), True),
+                 help="A szűrt sorok kijelölése")
+    bcol2.button("Egyik sem", key=f"{key_prefix}_none", on_click=set_all, args=(view.index.tolist(), False),
+                 help="A szűrt sorok kijelölésének törlése")
+    bcol3.caption(f"{len(selected)} kijelölve • {len(view)} / {len(df)} eredmény látszik")
     if max_select and len(selected) > max_select:
         st.warning(f"Max {max_select} jelölhető.")
-    return selected
+    return df.index[df.index.isin(selected)].tolist()
 
 # -------------------- Adatok --------------------
-if "idok" not in st.session_state or st.session_state.idok.empty:
+idok_store = session_store(st.session_state)
+if idok_store.empty:
     st.warning("Nincsenek megadva időeredmények.")
+    prof.render()
     st.stop()
-idok = st.session_state.idok.copy()
+with prof.section("Adatok (IDŐK nézet)"):
+    idok = idok_store.frame().copy()
 gender = st.session_state.get("gender", "Man")
+# a tabok ide teszik az exportálható eredményeiket (PDF riport); sima dict, így a
+# letöltéskor, a script futásán kívül is olvasható
+export = st.session_state.setdefault("export", {})
+
+
+# -------------------- Export --------------------
+def export_panel():
+    """PDF letöltés a tab végén; a tab fragmentjében fut, így minden (fragment) rerun friss állapotot rajzol."""
+    st.divider()
+    ready = [name for name, key in (("CS", "cs_result"), ("Riegel", "riegel_result"), ("WA", "wa_results"))
+             if key in export]
+    st.download_button("📄 PDF riport letöltése", data=lambda: report_pdf(export, gender),
+                       file_name="futo_riport.pdf", mime="application/pdf", on_click="ignore",
+                       key="report_pdf", disabled=not ready)
+    st.caption(f"A riportba kerül: {', '.join(ready)}." if ready else
+               "A riport a megnyitott tabok eredményeiből készül: előbb számolj CS-t, Riegelt vagy WA pontot.")
+
+
+def with_export(func):
+    """Tab törzs dekorátor (a fragment alá): a tab tartalma után az export panel (korai return esetén is)."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            export_panel()
+    return wrapper
 
-# -------------------- Tabok --------------------
-tab1, tab2, tab3 = st.tabs(["🏁 Kritikus Sebesség", "📐 Riegel-exponens", "🏅 WA Score"])
 
 # ===========================================================
 #                 KRITIKUS SEBESSÉG (meghagyva)
 # ===========================================================
-with tab1:
+@st.fragment
+@prof.fragment("CS tab")
+@with_export
+def cs_section(idok: pd.DataFrame):
+    """CS tab; saját fragmentként fut, a kijelölés / modellváltás csak ezt futtatja újra."""
     st.subheader("Kritikus sebesség (Critical Speed, CS)")
     info_box(
         "Mi az a Kritikus sebesség?",
@@ -182,16 +309,31 @@ with tab1:
         "Forrás és ajánlott irodalom: Philip Skiba: Scientific Training for Endurance Athletes",
         icon="🔥"
     )
-    st.info("**Ajánlás:** 3–20 perc közötti idők használata. **Max. 3** idő jelölhető ki.")
+    st.info("**Ajánlás:** 3–20 perc közötti idők használata. Több eredmény stabilabb illesztést ad; "
+            "a 3-paraméteres modellhez legalább 3 idő kell.")
+
+    mcol1, mcol2 = st.columns([2, 1])
+    cs_model = mcol1.selectbox("Modell", list(CS_MODELS), format_func=CS_MODELS.get, key="cs_model")
+    cs_recent = mcol2.checkbox("Frissebb eredmények nagyobb súllyal", key="cs_recent",
+                               help="Súly = 2^(−kor/365 nap), a Dátum oszlop alapján.")
 
-    sel = result_cards_selector(idok, "cs", max_select=3, ncols=8)
+    sel = result_selector(idok, "cs")
     use = idok.loc[sel].copy()
-    if len(use) >= 2:
+    if len(use) >= (3 if cs_model == "morton" else 2):
         use["m"] = use["Versenyszám"].map(EVENT_TO_METERS)
-        use["s"] = use["Idő"].apply(time_to_seconds)
+        use["s"] = to_seconds(use["Idő"])
         x = use["s"].values; y = use["m"].values
-        A = np.vstack([x, np.ones_like(x)]).T
-        cs, dprime = np.linalg.lstsq(A, y, rcond=None)[0]
+        w = recency_weights(use["Dátum"]) if cs_recent and "Dátum" in use else None
+        with prof.section("CS illesztés"):
+            fit = fit_critical_speed(np.zeros(len(x)), x, y, cs_model, weights=w, n_groups=1, window=None).iloc[0]
+        cs, dprime = float(fit["cs"]), float(fit["dprime"])
+    else:
+        cs = float("nan")
+    if not np.isfinite(cs) or cs <= 0:
+        export.pop("cs_result", None)
+        if len(use) >= 2:
+            st.warning("A kijelölt eredményekre a modell nem illeszthető (próbálj más időket vagy modellt).")
+    else:
         pace = 1000.0 / cs
 
         st.markdown(
@@ -207,77 +349,41 @@ with tab1:
             unsafe_allow_html=True,
         )
 
-
-        import io
-
-        # ... kritikus sebesség számítás után:
-        xs = np.linspace(x.min() * 0.9, x.max() * 1.1, 100)
-        ys = cs * xs + dprime
-        fig, ax = plt.subplots(figsize=(3.6, 2.6), dpi=120)
-        ax.scatter(x, y, s=12)
-        ax.plot(xs, ys, linewidth=1.2)
-        ax.set_xlabel("Idő (s)", fontsize=9)
-        ax.set_ylabel("Táv (m)", fontsize=9)
-        ax.tick_params(axis="both", labelsize=8)
-        st.pyplot(fig, use_container_width=False)
-
-        # --- ÚJ: mentés a session-be exporthoz ---
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=120, bbox_inches="tight")
-        buf.seek(0)
-        st.session_state["cs_result"] = {
+        unit = {"linear": "m", "inverse": "m/s", "morton": "s"}[cs_model]
+        diag = f"n = {int(fit['n'])} • R² = {fit['r2']:.4f} • RMSE = {fit['rmse']:.2f} {unit}"
+        if np.isfinite(fit["se_cs"]):
+            diag += f" • CS ± {fit['se_cs']:.3f} m/s • D′ ± {fit['se_dprime']:.0f} m"
+        if cs_model == "morton" and np.isfinite(fit["vmax"]):
+            diag += f" • vmax = {fit['vmax']:.2f} m/s"
+        st.caption(diag)
+
+        # ábra: bemenetek szerint cache-elt PNG, ugyanaz megy a kijelzőre és az exportba
+        vmax = float(fit["vmax"]) if cs_model == "morton" else None
+        with prof.section("CS ábra (matplotlib)"):
+            plot_png = cs_plot(x, y, cs, dprime, vmax=vmax, fmt="png")
+        st.image(plot_png)
+
+        export["cs_result"] = {
             "pace_str": seconds_to_mmss_per_km(pace),
             "cs": cs,
             "dprime": dprime,
-            "plot_png": buf.getvalue(),
+            "plot_png": plot_png,
+            "vmax": vmax,
         }
 
         # --- Zóna kalkuláció és zóna-kártya renderelés ---
 
         cs_sec_per_km = pace  # mp/km float tempó a kritikus sebességhez
 
-        def zone_interval(f_hi, f_lo):
-            """
-            f_hi, f_lo pl. 1.24 és 1.15
-            Lassabb tempó (magasabb mp/km) = felső érték.
-            Visszatér: ("3:45", "3:30") jellegű stringpár.
-            """
-            hi = cs_sec_per_km * f_hi
-            lo = cs_sec_per_km * f_lo
-            return seconds_to_mmss(hi), seconds_to_mmss(lo)
-
-        zones = [
-            {
-                "zona": "Z1 Regeneráció",
-                "range": ">124%",
-                "pace_txt": f"{seconds_to_mmss(cs_sec_per_km * 1.24)}+",
-            },
-            {
-                "zona": "Z2 Állóképesség",
-                "range": "124–115%",
-                "pace_txt": " - ".join(zone_interval(1.24, 1.15)),
-            },
-            {
-                "zona": "Z3 Tempó",
-                "range": "114–105%",
-                "pace_txt": " - ".join(zone_interval(1.14, 1.05)),
-            },
-            {
-                "zona": "Z4 Threshold",
-                "range": "104–95%",
-                "pace_txt": " - ".join(zone_interval(1.04, 0.95)),
-            },
-            {
-                "zona": "Z5 VO₂max",
-                "range": "94–84%",
-                "pace_txt": " - ".join(zone_interval(0.94, 0.84)),
-            },
-            {
-                "zona": "Z6 Anaerob",
-                "range": "<84%",
-                "pace_txt": f"{seconds_to_mmss(cs_sec_per_km * 0.84)}-",
-            },
-        ]
+        zones = []
+        for name, label, slow, fast in CS_ZONES:
+            if slow is None:
+                pace_txt = f"{seconds_to_mmss(cs_sec_per_km * fast)}+"
+            elif fast is None:
+                pace_txt = f"{seconds_to_mmss(cs_sec_per_km * slow)}-"
+            else:
+                pace_txt = f"{seconds_to_mmss(cs_sec_per_km * slow)} - {seconds_to_mmss(cs_sec_per_km * fast)}"
+            zones.append({"zona": name, "range": label, "pace_txt": pace_txt})
 
         # --- Stílus a kártyához (egyszer beszúrjuk itt) ---
         st.markdown("""
@@ -415,44 +521,71 @@ with tab1:
         # itt NEM st.markdown, hanem egy valódi HTML iframe render
         components.html(card_html, height=440, scrolling=False)
 
+
 # ===========================================================
 #                 RIEGEL EXPONENS (meghagyva)
 # ===========================================================
-with tab2:
+@st.fragment
+@prof.fragment("Riegel tab")
+@with_export
+def riegel_section(idok: pd.DataFrame):
+    """Riegel tab (fragment)."""
     st.subheader("Riegel-exponens")
     info_box(
         "Mi az a Riegel-exponens?",
         "A <b>Riegel-exponens</b> (<i>k</i>) egyszerűen szólva azt írja le, hogy mennyit lassulunk, ahogy növeljük a versenytávot.<br> "
-        "Két ismert eredményből becsüljük <i>k</i>-t, majd ezzel előrejelzünk egy harmadik választott távra, rávetítve a várható lassulást/gyorsulást",
+        "Két vagy több ismert eredményből becsüljük <i>k</i>-t, majd ezzel előrejelzünk bármely távra, rávetítve a várható lassulást/gyorsulást",
         icon="🧪"
     )
 
-    st.info("**Ajánlás:** válassz két eredményt (a cél versenytávhoz minél közelebbi számok), majd add meg a cél versenyszámot.")
+    st.info("**Ajánlás:** válassz legalább két eredményt; több eredménynél *k* log–log regresszióval "
+            "adódik. A távtartománnyal a cél versenytávhoz közeli eredményekre szűkíthetsz.")
 
-    sel = result_cards_selector(idok, "riegel", max_select=2, ncols=8)
-    target = st.selectbox("Cél versenyszám", EVENT_OPTIONS, key="riegel_target_select")
+    sel = result_selector(idok, "riegel")
+    rcol1, rcol2 = st.columns([1, 1])
+    target = rcol1.selectbox("Cél versenyszám", EVENT_OPTIONS, key="riegel_target_select")
+    window = rcol2.select_slider("Távtartomány (m)", options=RIEGEL_DISTANCES,
+                                 value=(RIEGEL_DISTANCES[0], RIEGEL_DISTANCES[-1]),
+                                 format_func=lambda m: f"{m:g}", key="riegel_window")
 
-    if len(sel) == 2:
+    if len(sel) >= 2:
         df = idok.loc[sel].copy()
         df["m"] = df["Versenyszám"].map(EVENT_TO_METERS)
-        df["s"] = df["Idő"].apply(time_to_seconds)
-        d1, t1 = float(df.iloc[0]["m"]), float(df.iloc[0]["s"])
-        d2, t2 = float(df.iloc[1]["m"]), float(df.iloc[1]["s"])
-        k = math.log(t2 / t1) / math.log(d2 / d1) if d1 != d2 else None
-        if k:
+        df["s"] = to_seconds(df["Idő"])
+        # cache kulcs: a kiválasztott eredményhalmaz + távtartomány; célváltáskor nincs újraszámolás
+        with prof.section("Riegel illesztés + előrejelzés"):
+            fit, grid = riegel_grid(tuple(df["s"]), tuple(df["m"]), tuple(window))
+        k = fit["k"] if np.isfinite(fit["k"]) else None
+        if not k:
+            export.pop("riegel_result", None)
+            st.warning("A távtartományban legalább két különböző távú eredmény kell.")
+        else:
+            report_events = list(dict.fromkeys([target, *DEFAULT_TARGETS]))
+            export["riegel_result"] = {
+                "k": k,
+                "predictions": [(e, float(grid.at[e, "Várható idő (s)"])) for e in report_events if e in grid.index],
+            }
+            row = grid.loc[target]
+            t_pred, ref = float(row["Várható idő (s)"]), (float(row["Ref táv (m)"]), float(row["Ref idő (s)"]))
             d_target = EVENT_TO_METERS[target]
-            ref = (d1, t1) if abs(d_target - d1) < abs(d_target - d2) else (d2, t2)
-            t_pred = ref[1] * (d_target / ref[0]) ** k
             if t_pred:
                 pretty = seconds_to_hms(t_pred) if t_pred >= 3600 else seconds_to_mmss(t_pred)
                 st.success(f"**Várható idő** {target}: **{pretty}**")
 
+            if fit["n"] == 2:
+                # ugyanazok a pontok, mint a riegel_fit-ben: a távtartományban, véges pozitív idővel
+                used = df[df["m"].between(*window) & np.isfinite(df["s"]) & (df["s"] > 0)]
+                (d1, t1), (d2, t2) = used[["m", "s"]].astype(float).to_numpy()[:2]
+                k_line = (f"<code>k = ln(T₂/T₁) / ln(D₂/D₁)</code><br>"
+                          f"Behelyettesítve: <code>k = ln({t2:.2f}/{t1:.2f}) / ln({d2:.0f}/{d1:.0f}) = {k:.4f}</code>")
+            else:
+                k_line = (f"<code>ln T = k · ln D + c</code> (log–log regresszió, {int(fit['n'])} eredmény)<br>"
+                          f"<code>k = {k:.4f} ± {fit['se_k']:.4f}</code>, R² = {fit['r2']:.4f}")
             st.markdown(
                 f"""
                 <div style="border-left:4px solid #3b82f6;background:#eef6ff;padding:10px 12px;border-radius:6px;">
                   <b>Riegel képletek és számítás:</b><br>
-                  <code>k = ln(T₂/T₁) / ln(D₂/D₁)</code><br>
-                  Behelyettesítve: <code>k = ln({t2:.2f}/{t1:.2f}) / ln({d2:.0f}/{d1:.0f}) = {k:.4f}</code><br><br>
+                  {k_line}<br><br>
                   <code>T_target = T_ref × (D_target / D_ref)^k</code><br>
                   Behelyettesítve: <code>T_target = {ref[1]:.2f} × ({d_target:.0f}/{ref[0]:.0f})^{k:.4f} = {t_pred:.2f} s</code>
                 </div>
@@ -460,10 +593,21 @@ with tab2:
                 unsafe_allow_html=True,
             )
 
+            with st.expander("Várható idők minden versenyszámra"):
+                view = grid.copy()
+                view["Várható idő"] = [seconds_to_hms(v) if v >= 3600 else seconds_to_mmss(v)
+                                       for v in view["Várható idő (s)"]]
+                st.dataframe(view[["Táv (m)", "Várható idő", "Ref táv (m)"]], width="stretch")
+
+
 # ===========================================================
 #                 WA SCORE (új kód hozzáadva)
 # ===========================================================
-with tab3:
+@st.fragment
+@prof.fragment("WA tab")
+@with_export
+def wa_section(idok: pd.DataFrame, gender: str):
+    """WA tab: pontozás, kártyák, összegzés (fragment); a kalkulátor ebben is külön fut."""
     st.subheader("WA pontszám")
     info_box(
         "Mi az a WA pontszám",
@@ -472,49 +616,24 @@ with tab3:
         icon="🏅"
     )
 
-    # WA tábla betöltése (.csv)
-    candidates = [
-        Path("wa_score_merged_standardized.csv"),
-        Path(__file__).resolve().parent.parent / "wa_score_merged_standardized.csv",
-        Path(__file__).resolve().parent / "wa_score_merged_standardized.csv",
-        Path(os.getcwd()) / "wa_score_merged_standardized.csv",
-    ]
-    wa_path = next((p for p in candidates if p.is_file()), None)
-
-    if wa_path is None:
+    # WA ponttábla: folyamatszintű, közös példány (a CSV változását magától észleli)
+    try:
+        with prof.section("Ponttábla betöltés"):
+            score_table = load_score_table()
+    except (OSError, ValueError, KeyError):
         st.error("❌ A WA ponttáblát nem sikerült betölteni (**wa_score_merged_standardized.csv**).")
-        st.stop()
-
-    wa_df = pd.read_csv(wa_path)
-
-    # konverzió: score -> points, result -> result_sec
-    wa_df = wa_df.rename(columns={"score": "points"})
-    if "result_sec" not in wa_df.columns:
-        wa_df["result_sec"] = wa_df["result"].apply(lambda x: time_to_seconds(str(x)))
-
-    # Segédfüggvény: idő → WA pont
-    def wa_points_lookup(g: str, event: str, t_sec: float) -> float | None:
-        sub = wa_df[(wa_df["gender"] == g) & (wa_df["discipline"] == event)].copy()
-        if sub.empty or not np.isfinite(t_sec):
-            return None
-        sub = sub.dropna(subset=["result_sec"])
-        sub = sub.sort_values("result_sec")
-        idx = np.searchsorted(sub["result_sec"].values, t_sec, side="left")
-        if idx >= len(sub):
-            idx = len(sub) - 1
-        return float(sub.iloc[idx]["points"])
-
-    # Pontszámok hozzárendelése
+        return
+
+    # Pontszámok hozzárendelése (egy vektorizált hívás az egész táblára)
     work = idok.copy()
-    work["s"] = work["Idő"].apply(time_to_seconds)
-    work["WA pont"] = work.apply(
-        lambda r: wa_points_lookup(gender, r["Versenyszám"], r["s"]), axis=1
-    )
+    with prof.section("WA pontozás"):
+        work["s"] = to_seconds(work["Idő"])
+        work["WA pont"] = score_table.score_frame(work, gender=gender)
     work = work.dropna(subset=["WA pont"])
     work = work.sort_values("WA pont", ascending=False)
 
     # HOgy be tudjuk tölteni majd az Exporthoz
-    st.session_state["wa_results"] = work
+    export["wa_results"] = work
 
     # KÁRTYÁK
     # ---- CSS definiálása egyszer ----
@@ -545,14 +664,15 @@ with tab3:
     """, unsafe_allow_html=True)
 
     # ---- Dinamikus HTML tartalom ----
-    cards_html = '<div class="wa-box"><div class="wa-grid">'
+    with prof.section("WA kártyák (HTML)"):
+        cards_html = '<div class="wa-box"><div class="wa-grid">'
 
-    for _, row in work.iterrows():
-        cards_html += f'<div class="wa-card">{row["Versenyszám"]} ({row["Idő"]}): 🏅 {int(round(row["WA pont"]))} p</div>'
+        for _, row in work.iterrows():
+            cards_html += f'<div class="wa-card">{row["Versenyszám"]} ({row["Idő"]}): 🏅 {int(round(row["WA pont"]))} p</div>'
 
-    cards_html += '</div></div>'
+        cards_html += '</div></div>'
 
-    st.markdown(cards_html, unsafe_allow_html=True)
+        st.markdown(cards_html, unsafe_allow_html=True)
 
     # ---- Összegzés emojikkal ----
     if not work.empty:
@@ -567,6 +687,13 @@ with tab3:
             """
         )
 
+    wa_calculator(work, score_table, gender)
+
+
+@st.fragment
+@prof.fragment("WA kalkulátor")
+def wa_calculator(work: pd.DataFrame, score_table, gender: str):
+    """Kalkulátor + egyenértékű idők: kattintásra a pontozott tábla és a kártyák nem épülnek újra."""
     st.divider()
     st.subheader("WA Kalkulátor")
 
@@ -579,7 +706,8 @@ with tab3:
     )
     st.markdown("<br>", unsafe_allow_html=True)
 
-    sel_calc = result_cards_selector(work, "wa_calc", max_select=3, ncols=8)
+    sel_calc = result_selector(work, "wa_calc", max_select=3,
+                               columns=("Versenyszám", "Idő", "Dátum", "WA pont"))
     use_calc = work.loc[sel_calc].copy()
 
     avg_pts = None
@@ -592,12 +720,52 @@ with tab3:
     target2 = st.selectbox("Cél versenyszám", EVENT_OPTIONS, key="wa_calc_target")
 
     if avg_pts:
-        sub = wa_df[(wa_df["gender"] == gender) & (wa_df["discipline"] == target2)].copy()
-        if not sub.empty:
-            sub = sub.dropna(subset=["result_sec"])
-            sub = sub.sort_values("points", ascending=False)
-            diffs = (sub["points"] - avg_pts).abs().values
-            idx = int(diffs.argmin())
-            t_pred = float(sub.iloc[idx]["result_sec"])
+        # inverz index: pont -> idő, tört átlagpontra interpolálva
+        t_pred = score_table.seconds_for(gender, target2, avg_pts, interpolate=True)
+        if t_pred is not None:
             pretty = seconds_to_hms(t_pred) if t_pred >= 3600 else seconds_to_mmss(t_pred)
-            st.success(f"**Várható idő** {target2}: **{pretty}** (≈ {int(round(sub.iloc[idx]['points']))} p)")
\ No newline at end of file
+            st.success(f"**Várható idő** {target2}: **{pretty}** (≈ {int(round(avg_pts))} p)")
+
+    # ---- Egyenértékű idők minden versenyszámban ----
+    st.divider()
+    st.subheader("Egyenértékű idők")
+    base_opts = ["Legjobb eredmény"] + (["Kijelölt átlag"] if avg_pts else []) + ["Egyéni pontszám"]
+    base = st.radio("Pontszám alapja", base_opts, horizontal=True, key="wa_eq_base")
+    if base == "Kijelölt átlag":
+        eq_pts = avg_pts
+    elif base == "Egyéni pontszám":
+        eq_pts = st.number_input("WA pont", min_value=0, max_value=1400, value=1000, step=10, key="wa_eq_pts")
+    else:
+        eq_pts = float(work["WA pont"].iloc[0]) if not work.empty else None
+
+    if eq_pts:
+        with prof.section("WA egyenértékű idők"):
+            eq = wa_equivalence(score_table_version(), gender, round(float(eq_pts), 1))
+        st.caption(f"{int(round(eq_pts))} p-nek megfelelő idők a ponttábla összes versenyszámában ({gender}).")
+        ecol1, ecol2 = st.columns(2)
+        with ecol1:
+            st.markdown("**Pálya**")
+            st.dataframe(eq[eq["Kategória"] != "Országúti"][["Kategória", "Idő"]], width="stretch")
+        with ecol2:
+            st.markdown("**Országúti**")
+            st.dataframe(eq[eq["Kategória"] == "Országúti"][["Idő"]], width="stretch")
+
+
+# -------------------- Tabok --------------------
+# on_change="rerun": csak a kiválasztott tab tartalma fut le (tab.open), a többi
+# (matplotlib, ponttábla) addig be sem töltődik, amíg meg nem nyitják
+# a tabok tartalma fragment: a bennük lévő widgetek csak a saját tabjukat futtatják újra;
+# függőségük az IDŐK tábla és a nem, ezek változása (más oldalon) teljes újrafutást jelent
+tab1, tab2, tab3 = st.tabs(["🏁 Kritikus Sebesség", "📐 Riegel-exponens", "🏅 WA Score"],
+                           key="elemzes_tab", on_change="rerun")
+with tab1:
+    if tab1.open:
+        cs_section(idok)
+with tab2:
+    if tab2.open:
+        riegel_section(idok)
+with tab3:
+    if tab3.open:
+        wa_section(idok, gender)
+
+prof.render()
@@ -0,0 +1,184 @@
+# pb_cache.py
+"""
+Tartós, lemezen tárolt PB cache (SQLite), a kanonikus WA profil URL a kulcs.
+
+- TTL-en belül: azonnali találat, nincs hálózat / Chromium.
+- TTL után, de `max_stale`-en belül: a régi adatot adjuk vissza, és egy háttérszál
+  frissíti (stale-while-revalidate).
+- `max_stale` után, vagy `force=True` esetén: szinkron letöltés; ha az nem sikerül,
+  a régi adat még mindig jobb a semminél (forrás: 'stale-error'); ha nincs régi adat,
+  a letöltési hiba a hívóhoz kerül.
+- Méretkorlát: a legrégebben használt bejegyzések törlődnek (`max_entries`).
+
+Beállítás környezeti változókkal: WA_PB_CACHE_PATH, WA_PB_CACHE_TTL (mp),
+WA_PB_CACHE_MAX_STALE (mp), WA_PB_CACHE_MAX_ENTRIES.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PATH = Path(__file__).resolve().parent / ".cache" / "pb_cache.sqlite"
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_STALE = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pb_cache (
+    url         TEXT PRIMARY KEY,
+    fetched_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    rows        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pb_cache_accessed ON pb_cache (accessed_at);
+"""
+
+
+def canonical_url(url: str) -> str:
+    """Kisbetűs host, https, query/fragment és záró '/' nélkül -> egy profil = egy kulcs."""
+    parts = urlsplit(url.strip())
+    if not parts.netloc:  # "worldathletics.org/athletes/..." séma nélkül
+        parts = urlsplit("https://" + url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    scheme = "https" if parts.scheme in ("", "http", "https") else parts.scheme
+    return urlunsplit((scheme, host, parts.path.rstrip("/").lower(), "", ""))
+
+
+class PBCache:
+    def __init__(self, path=DEFAULT_PATH, ttl: float = DEFAULT_TTL,
+                 max_stale: float = DEFAULT_MAX_STALE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_stale = max(max_stale, ttl)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inflight = set()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Szálanként saját kapcsolat (a sqlite3 kapcsolat nem osztható szálak között)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ====== Alap műveletek ======
+    def get(self, url: str):
+        """(rows, kor másodpercben) vagy None, ha nincs bejegyzés."""
+        key = canonical_url(url)
+        conn = self._conn()
+        row = conn.execute("SELECT fetched_at, rows FROM pb_cache WHERE url = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        conn.execute("UPDATE pb_cache SET accessed_at = ? WHERE url = ?", (now, key))
+        return json.loads(row[1]), now - row[0]
+
+    def put(self, url: str, rows: list[dict]) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO pb_cache (url, fetched_at, accessed_at, rows) VALUES (?, ?, ?, ?)",
+            (canonical_url(url), now, now, json.dumps(rows, ensure_ascii=False)),
+        )
+        self._evict(conn)
+
+    def _evict(self, conn) -> None:
+        conn.execute(
+            "DELETE FROM pb_cache WHERE url IN ("
+            " SELECT url FROM pb_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def invalidate(self, url: str) -> None:
+        self._conn().execute("DELETE FROM pb_cache WHERE url = ?", (canonical_url(url),))
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM pb_cache")
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM pb_cache").fetchone()[0]
+
+    # ====== Cache-elt betöltés ======
+    def _refresh(self, url: str, fetch) -> list[dict]:
+        rows = fetch(url)
+        if rows:  # üres / hibás választ nem cache-elünk
+            self.put(url, rows)
+        return rows
+
+    def _refresh_in_background(self, url: str, fetch) -> None:
+        key = canonical_url(url)
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+
+        def run():
+            try:
+                self._refresh(url, fetch)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+
+        threading.Thread(target=run, daemon=True, name="pb-cache-refresh").start()
+
+    def fetch(self, url: str, fetch, force: bool = False) -> tuple[list[dict], str]:
+        """
+        Cache-elt betöltés a `fetch(url) -> rows` függvénnyel.
+        Visszatérés: (rows, forrás), ahol a forrás 'cache', 'stale' (háttérben frissül),
+        'fresh', vagy 'stale-error' (a frissítés nem sikerült, a régi adatot adjuk).
+        Ha a letöltés kivételt dob és nincs mentett adat, a kivétel továbbmegy.
+        """
+        hit = None if force else self.get(url)
+        if hit is not None:
+            rows, age = hit
+            if age <= self.ttl:
+                return rows, "cache"
+            if age <= self.max_stale:
+                self._refresh_in_background(url, fetch)
+                return rows, "stale"
+        try:
+            rows = self._refresh(url, fetch)
+        except Exception:
+            # sikertelen frissítés: a régi adat is jobb a semminél; ha nincs, a hiba a hívóé
+            hit = hit or self.get(url)
+            if hit is None:
+                raise
+            return hit[0], "stale-error"
+        if rows:
+            return rows, "fresh"
+        # üres válasz (pl. nincs PB tábla): ha van mentett adat, azt adjuk
+        hit = hit or self.get(url)
+        if hit is not None:
+            return hit[0], "stale-error"
+        return [], "fresh"
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_pb_cache() -> PBCache:
+    """Folyamatszintű cache példány (a környezeti változók alapján)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = PBCache(
+                path=os.environ.get("WA_PB_CACHE_PATH", DEFAULT_PATH),
+                ttl=float(os.environ.get("WA_PB_CACHE_TTL", DEFAULT_TTL)),
+                max_stale=float(os.environ.get("WA_PB_CACHE_MAX_STALE", DEFAULT_MAX_STALE)),
+                max_entries=int(os.environ.get("WA_PB_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _CACHE
@@ -0,0 +1,67 @@
+# plots.py
+"""
+Cache-elt ábra renderelés.
+
+Az ábrákat a pyplot globális registry-je nélkül (`matplotlib.figure.Figure`)
+rajzoljuk, a kész képet bájtként adjuk vissza, és a bemenetek szerint egy
+korlátos LRU-ban tartjuk. Így rerunkor nincs újrarajzolás, nincs szivárgó
+figure, és ugyanaz a PNG/SVG megy a kijelzőre és az exportba is.
+"""
+import io
+import os
+from functools import lru_cache
+
+import numpy as np
+
+PLOT_CACHE_SIZE = int(os.environ.get("WA_PLOT_CACHE_SIZE", "128"))
+PLOT_DPI = 120
+
+
+def _key(values) -> tuple:
+    """Lebegőpontos bemenetek hash-elhető, zajtűrő kulcsa (a kijelzésnél finomabb eltérés nem számít)."""
+    return tuple(round(float(v), 4) for v in np.ravel(values))
+
+
+@lru_cache(maxsize=PLOT_CACHE_SIZE)
+def _render_cs_plot(x: tuple, y: tuple, cs: float, dprime: float, vmax, fmt: str) -> bytes:
+    from matplotlib.figure import Figure  # lusta import: csak renderelésnél kell
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+    xs = np.linspace(x.min() * 0.9, x.max() * 1.1, 100)
+    if vmax is not None and np.isfinite(vmax):
+        # 3-paraméteres modell: t = D′/(v − CS) + k, k = D′/(CS − vmax)  ->  v = CS + D′/(t − k)
+        k = dprime / (cs - vmax)
+        ys = xs * (cs + dprime / (xs - k))
+    else:
+        ys = cs * xs + dprime
+
+    fig = Figure(figsize=(3.6, 2.6), dpi=PLOT_DPI)
+    ax = fig.subplots()
+    ax.scatter(x, y, s=12)
+    ax.plot(xs, ys, linewidth=1.2)
+    ax.set_xlabel("Idő (s)", fontsize=9)
+    ax.set_ylabel("Táv (m)", fontsize=9)
+    ax.tick_params(axis="both", labelsize=8)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=PLOT_DPI, bbox_inches="tight")
+    # a Figure nincs a pyplot registry-ben: a referencia elengedésével felszabadul
+    fig.clear()
+    return buf.getvalue()
+
+
+def cs_plot(times, meters, cs: float, dprime: float, vmax: float | None = None, fmt: str = "png") -> bytes:
+    """
+    Kritikus sebesség ábra (pontok + illesztett modell) PNG vagy SVG bájtként, cache-elve.
+    `vmax` megadásakor a 3-paraméteres (Morton) görbét rajzolja az egyenes helyett.
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Nem támogatott formátum: {fmt}")
+    vmax = round(float(vmax), 4) if vmax is not None and np.isfinite(vmax) else None
+    return _render_cs_plot(_key(times), _key(meters), round(float(cs), 6), round(float(dprime), 4), vmax, fmt)
+
+
+def plot_cache_info():
+    """Az LRU statisztikája (hits, misses, maxsize, currsize)."""
+    return _render_cs_plot.cache_info()
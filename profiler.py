@@ -0,0 +1,192 @@
+# profiler.py
+"""
+Opcionális, rerunonkénti szakasz-időmérés a Streamlit oldalakhoz.
+
+Bekapcsolás: WA_PROFILE=1 környezeti változóval, vagy az URL-ben `?profile=1`
+(a session végéig megmarad, `?profile=0` kikapcsolja). Kikapcsolva a
+`section()` egy megosztott, üres context manager, így a mérés nem lassít.
+
+    prof = page_profiler("Adatelemzés")
+    with prof.section("CS illesztés"):
+        ...
+
+    @st.fragment
+    @prof.fragment("CS tab")
+    def cs_section(): ...
+
+    prof.render()   # az oldal alján: lenyitható bontás + JSON sor a naplóba
+
+A fragmentek önálló rerunját a `fragment()` külön rekordként naplózza és a
+fragmentben jeleníti meg. A napló JSON Lines (soronként egy rerun), helye:
+WA_PROFILE_LOG (alap: .cache/profile.jsonl).
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import streamlit as st
+
+ENV_FLAG = "WA_PROFILE"
+QUERY_PARAM = "profile"
+LOG_PATH = Path(os.environ.get("WA_PROFILE_LOG", Path(__file__).resolve().parent / ".cache" / "profile.jsonl"))
+
+_NULL = contextlib.nullcontext()
+_log_lock = threading.Lock()
+
+
+def _truthy(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def profiling_enabled() -> bool:
+    """Környezeti változó, vagy a session-ben megjegyzett `?profile=` query paraméter."""
+    param = st.query_params.get(QUERY_PARAM)
+    if param is not None:
+        st.session_state["_profile"] = _truthy(param)
+    return _truthy(os.environ.get(ENV_FLAG, "")) or st.session_state.get("_profile", False)
+
+
+def _run_context():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx()
+
+
+def append_log(record: dict, path: Path = LOG_PATH) -> None:
+    """Egy rekord hozzáfűzése a JSON Lines naplóhoz (írási hiba nem állítja meg az oldalt)."""
+    line = json.dumps(record, ensure_ascii=False)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+
+
+class PageProfiler:
+    """Egy rerun szakaszai: (név, mélység, ms) a befejezés sorrendjében."""
+
+    def __init__(self, page: str, enabled: bool):
+        self.page = page
+        self.enabled = enabled
+        self.sections = []
+        self._stack = []
+        self._sub = None
+        self._start = time.perf_counter()
+
+    def section(self, name: str):
+        """Időmérő blokk; egymásba ágyazható (a bontásban behúzva jelenik meg)."""
+        if not self.enabled:
+            return _NULL
+        return (self._sub or self)._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str):
+        depth = len(self._stack)
+        self._stack.append(name)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.sections.append({"name": name, "depth": depth, "ms": (time.perf_counter() - t0) * 1000})
+
+    def fragment(self, name: str):
+        """
+        Dekorátor egy `st.fragment` törzsére (a `@st.fragment` alá). Teljes rerunnál sima
+        `section`; a fragment önálló rerunjánál a mérés – a benne lévő szakaszokkal
+        együtt – külön rekord, és a fragmenten belül jelenik meg.
+        """
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self._fragment_section(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _fragment_section(self, name: str):
+        if not self.enabled:
+            return _NULL
+        ctx = _run_context()
+        if self._sub is not None or ctx is None or not ctx.fragment_ids_this_run:
+            return self.section(name)
+        return self._fragment_run(name)
+
+    @contextlib.contextmanager
+    def _fragment_run(self, name: str):
+        # a fragment a teljes rerunkor létrehozott profilert látja: a szakaszai a sub-ba mennek
+        self._sub = sub = PageProfiler(self.page, True)
+        try:
+            with sub.section(name):
+                yield
+        finally:
+            self._sub = None
+        sub._finish(kind="fragment", fragment=name)
+
+    def _record(self, total_ms: float, kind: str, fragment: str | None) -> dict:
+        ctx = _run_context()
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "kind": kind,
+            "fragment": fragment,
+            "session": ctx.session_id[:8] if ctx else None,
+            "total_ms": round(total_ms, 2),
+            "sections": [{**s, "ms": round(s["ms"], 2)} for s in self.sections],
+        }
+
+    def _finish(self, kind: str, fragment: str | None = None) -> None:
+        total_ms = (time.perf_counter() - self._start) * 1000
+        record = self._record(total_ms, kind, fragment)
+        append_log(record)
+        _show(record)
+
+    def render(self) -> None:
+        """A teljes rerun lezárása: bontás az oldal alján + naplórekord."""
+        if self.enabled:
+            self._finish(kind="full")
+
+
+def _show(record: dict) -> None:
+    total = record["total_ms"]
+    rows = [{
+        "Szakasz": ("\u2003" * (s["depth"] - 1) + "↳ " if s["depth"] else "") + s["name"],
+        "ms": s["ms"],
+        "%": round(100 * s["ms"] / total, 1) if total else 0.0,
+    } for s in _preorder(record["sections"])]
+    top = sum(s["ms"] for s in record["sections"] if s["depth"] == 0)
+    if record["kind"] == "full":
+        rows.append({"Szakasz": "egyéb (importok, widgetek, mérés nélküli kód)", "ms": round(total - top, 2),
+                     "%": round(100 * (total - top) / total, 1) if total else 0.0})
+    label = f"⏱️ Futásidő: {total:.0f} ms" + (f" – {record['fragment']} (fragment)" if record["fragment"] else "")
+    with st.expander(label, expanded=False):
+        st.dataframe(rows, hide_index=True, width="stretch")
+        st.caption(f"Napló: {LOG_PATH}")
+
+
+def _preorder(sections: list[dict]) -> list[dict]:
+    """A befejezési (post-order) sorrendből szülő-előbb sorrend a megjelenítéshez."""
+    out, pending = [], []
+    for s in sections:
+        children = []
+        while pending and pending[-1]["depth"] > s["depth"]:
+            children.append(pending.pop())
+        pending.append({**s, "_children": children[::-1]})
+
+    def walk(items):
+        for item in items:
+            out.append({k: v for k, v in item.items() if k != "_children"})
+            walk(item["_children"])
+
+    walk(pending)
+    return out
+
+
+def page_profiler(page: str) -> PageProfiler:
+    """A rerun profilere; a lehető legkorábban (a set_page_config után) hozd létre."""
+    return PageProfiler(page, profiling_enabled())
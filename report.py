@@ -0,0 +1,368 @@
+# report.py
+"""
+PDF sportoló-riport: CS tempó és edzészónák, Riegel előrejelzések, WA pontok.
+
+Egy riport bemenete egy sima (picklelhető) dict, így ugyanaz a `build_report`
+szolgálja ki az elemző oldal letöltés gombját és a tömeges generálást. A font
+regisztráció és a stílusok folyamatonként egyszer készülnek el; tömeges módban
+az elemzés egyetlen vektorizált menet (`analysis.analyze_results`), a PDF-ek
+pedig egy process poolban renderelődnek.
+
+    python report.py roster_pbs.csv riportok/ --gender Man --workers 8
+"""
+import argparse
+import functools
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from analysis import (ATHLETE_COLS, CS_WINDOW, CS_ZONES, DEFAULT_TARGETS, EVENT_COLS, EVENT_TO_METERS,
+                      GENDER_COLS, TIME_COLS, analyze_results, read_table)
+from time_parse import to_seconds
+
+FONT_DIR = Path(__file__).resolve().parent / "fonts"
+FONT_NAME = "DejaVuSans"
+
+
+# ====== Formázás ======
+def _fmt_time(sec) -> str:
+    if sec is None or not np.isfinite(sec):
+        return "–"
+    if sec >= 3600:
+        h, rem = divmod(int(round(sec)), 3600)
+        return f"{h}:{rem // 60:02d}:{rem % 60:02d}"
+    m, s = divmod(float(sec), 60)
+    return f"{int(m)}:{s:05.2f}" if m else f"{s:.2f}"
+
+
+def _fmt_pace(sec_per_km) -> str:
+    if sec_per_km is None or not np.isfinite(sec_per_km):
+        return "–"
+    m, s = divmod(int(round(sec_per_km)), 60)
+    return f"{m}:{s:02d} /km"
+
+
+# ====== Font és stílusok (folyamatonként egyszer) ======
+@functools.lru_cache(maxsize=None)
+def register_fonts() -> str:
+    """A DejaVuSans regisztrálása (ékezetes betűkhöz); ha nem érhető el, Helvetica."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont, TTFError
+
+    try:
+        pdfmetrics.registerFont(TTFont(FONT_NAME, str(FONT_DIR / "DejaVuSans.ttf")))
+    except (OSError, TTFError):
+        return "Helvetica"
+    return FONT_NAME
+
+
+@functools.lru_cache(maxsize=None)
+def _styles() -> dict:
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    font = register_fonts()
+    base = getSampleStyleSheet()
+    grid = [
+        ("FONTNAME", (0, 0), (-1, -1), font),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eef2f5")),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.6, colors.HexColor("#3d5361")),
+        ("LINEBELOW", (0, 1), (-1, -1), 0.25, colors.HexColor("#e5e7eb")),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]
+    return {
+        "title": ParagraphStyle("wa_title", parent=base["Title"], fontName=font, fontSize=16,
+                                textColor=colors.HexColor("#3d5361")),
+        "h2": ParagraphStyle("wa_h2", parent=base["Heading2"], fontName=font, fontSize=12,
+                             textColor=colors.HexColor("#3d5361"), spaceBefore=10),
+        "body": ParagraphStyle("wa_body", parent=base["BodyText"], fontName=font, fontSize=9.5),
+        "muted": ParagraphStyle("wa_muted", parent=base["BodyText"], fontName=font, fontSize=8,
+                                textColor=colors.HexColor("#6c7a86")),
+        "table": grid,
+    }
+
+
+# ====== Egy riport ======
+def _table(rows, col_widths=None):
+    from reportlab.platypus import Table, TableStyle
+
+    t = Table(rows, colWidths=col_widths, hAlign="LEFT", repeatRows=1)
+    t.setStyle(TableStyle(_styles()["table"]))
+    return t
+
+
+def _cs_drawing(x, y, cs: float, dprime: float, vmax=None):
+    """
+    CS ábra natív (vektoros) reportlab rajzként: pontok + illesztett modell.
+    Tömeges módban ez váltja ki a matplotlib PNG-t (~140 ms helyett ~2 ms riportonként).
+    """
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.shapes import Drawing, Group, String
+    from reportlab.graphics.widgets.markers import makeMarker
+    from reportlab.lib import colors
+
+    font = register_fonts()
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xs = np.linspace(x.min() * 0.9, x.max() * 1.1, 40)
+    if vmax is not None and np.isfinite(vmax):
+        k = dprime / (cs - vmax)
+        ys = xs * (cs + dprime / (xs - k))
+    else:
+        ys = cs * xs + dprime
+
+    d = Drawing(260, 180)
+    lp = LinePlot()
+    lp.x, lp.y, lp.width, lp.height = 42, 30, 205, 135
+    lp.data = [list(zip(x.tolist(), y.tolist())), list(zip(xs.tolist(), ys.tolist()))]
+    lp.lines[0].strokeColor = None
+    lp.lines[0].symbol = makeMarker("FilledCircle", size=4, fillColor=colors.HexColor("#1f77b4"))
+    lp.lines[1].strokeColor = colors.HexColor("#ff7f0e")
+    lp.lines[1].strokeWidth = 1.2
+    for axis in (lp.xValueAxis, lp.yValueAxis):
+        axis.labels.fontName = font
+        axis.labels.fontSize = 7
+    d.add(lp)
+    d.add(String(145, 4, "Idő (s)", fontName=font, fontSize=8, textAnchor="middle"))
+    ylabel = Group(String(0, 0, "Táv (m)", fontName=font, fontSize=8, textAnchor="middle"))
+    ylabel.transform = (0, 1, -1, 0, 10, 97)  # 90°-kal elforgatva
+    d.add(ylabel)
+    return d
+
+
+def _cs_flowables(cs: dict) -> list:
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image, Paragraph
+
+    st = _styles()
+    speed, dprime = float(cs["cs"]), float(cs["dprime"])
+    pace = 1000.0 / speed
+    out = [Paragraph("Kritikus sebesség (CS)", st["h2"]),
+           Paragraph(f"Kritikus tempó: <b>{escape(_fmt_pace(pace))}</b> &nbsp; • &nbsp; CS: {speed:.2f} m/s"
+                     f" &nbsp; • &nbsp; D′: {dprime:.0f} m", st["body"])]
+
+    if cs.get("plot_png"):
+        out.append(Image(io.BytesIO(cs["plot_png"]), width=9 * cm, height=6.5 * cm, kind="proportional"))
+    elif cs.get("x") is not None and len(cs["x"]) >= 2:
+        out.append(_cs_drawing(cs["x"], cs["y"], speed, dprime, cs.get("vmax")))
+
+    rows = [["Zóna", "Tartomány", "Tempó"]]
+    for name, label, slow, fast in CS_ZONES:
+        if slow is None:
+            txt = f"{_fmt_pace(pace * fast)}+"
+        elif fast is None:
+            txt = f"{_fmt_pace(pace * slow)}-"
+        else:
+            txt = f"{_fmt_pace(pace * slow)} – {_fmt_pace(pace * fast)}"
+        rows.append([name, label, txt])
+    out.append(_table(rows, [3.2 * cm, 4 * cm, 6 * cm]))
+    return out
+
+
+def _riegel_flowables(riegel: dict) -> list:
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph
+
+    st = _styles()
+    out = [Paragraph("Riegel előrejelzés", st["h2"]),
+           Paragraph(f"Riegel-exponens: <b>k = {float(riegel['k']):.3f}</b>", st["body"])]
+    rows = [["Versenyszám", "Várható idő"]]
+    rows += [[event, _fmt_time(sec)] for event, sec in riegel.get("predictions", ()) if np.isfinite(sec)]
+    if len(rows) > 1:
+        out.append(_table(rows, [6 * cm, 4 * cm]))
+    return out
+
+
+def _wa_flowables(wa: list) -> list:
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph
+
+    st = _styles()
+    pts = [p for _, _, p in wa]
+    out = [Paragraph("WA pontszámok", st["h2"]),
+           Paragraph(f"Legjobb: <b>{int(round(max(pts)))} p</b> &nbsp; • &nbsp; átlag: {int(round(np.mean(pts)))} p",
+                     st["body"])]
+    rows = [["Versenyszám", "Idő", "WA pont"]] + [[e, str(t), f"{int(round(p))}"] for e, t, p in wa]
+    out.append(_table(rows, [6 * cm, 3 * cm, 2.5 * cm]))
+    return out
+
+
+def build_report(data: dict, out=None) -> bytes | None:
+    """
+    PDF riport egy sportolóról. `data` kulcsai (mind opcionális):
+      athlete, gender,
+      cs: {cs, dprime, [vmax], [plot_png] vagy [x, y] (mp, m) az ábrához},
+      riegel: {k, predictions: [(versenyszám, mp), ...]},
+      wa: [(versenyszám, idő, pont), ...] csökkenő pont szerint.
+    `out` (útvonal vagy fájlszerű) megadásakor oda ír, különben a PDF bájtjait adja vissza.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+    st = _styles()
+    title = data.get("athlete") or "Futó teljesítmény riport"
+    # a Paragraph XML-szerű markupot értelmez: a beillesztett szöveget (név, nem) escape-eljük
+    story = [Paragraph(escape(str(title)), st["title"]),
+             Paragraph(f"{escape(str(data.get('gender') or ''))} • készült: {date.today().isoformat()}", st["muted"])]
+    cs = data.get("cs")
+    if cs and np.isfinite(cs.get("cs", np.nan)) and cs["cs"] > 0:
+        story += _cs_flowables(cs)
+    riegel = data.get("riegel")
+    if riegel and np.isfinite(riegel.get("k", np.nan)):
+        story += _riegel_flowables(riegel)
+    if data.get("wa"):
+        story += _wa_flowables(data["wa"])
+    if len(story) == 2:
+        story.append(Paragraph("Nincs megjeleníthető elemzés.", st["body"]))
+
+    target = out if out is not None else io.BytesIO()
+    doc = SimpleDocTemplate(target if not isinstance(target, Path) else str(target), pagesize=A4,
+                            leftMargin=1.8 * cm, rightMargin=1.8 * cm, topMargin=1.6 * cm, bottomMargin=1.6 * cm,
+                            title=title, author="Futó teljesítmény")
+    doc.build(story)
+    return target.getvalue() if out is None else None
+
+
+# ====== Tömeges generálás ======
+def _pick(df: pd.DataFrame, names: list[str]):
+    return next((c for c in names if c in df.columns), None)
+
+
+def roster_payloads(df: pd.DataFrame, gender: str = "Man", targets=DEFAULT_TARGETS,
+                    cs_window=CS_WINDOW, plots: bool = True, score_table=None) -> list[dict]:
+    """
+    Hosszú eredménytábla -> sportolónként egy riport-dict. Az illesztések egyetlen
+    vektorizált menetben futnak; az ábrák nyers pontjai a dict-be kerülnek, a
+    rajzolás a workerben történik.
+    """
+    if score_table is None:
+        from wa_scores import load_score_table
+        score_table = load_score_table()
+    summary = analyze_results(df, gender=gender, targets=targets, cs_window=cs_window, score_table=score_table)
+
+    a_col, e_col, t_col = _pick(df, ATHLETE_COLS), _pick(df, EVENT_COLS), _pick(df, TIME_COLS)
+    g_col = _pick(df, GENDER_COLS)
+    df = df[df[a_col].notna()]
+    codes = pd.Categorical(df[a_col], categories=summary["Sportoló"]).codes
+    seconds = to_seconds(df[t_col])
+    meters = df[e_col].map(EVENT_TO_METERS).to_numpy(dtype=float)
+    genders = df[g_col].fillna(gender).to_numpy() if g_col else np.full(len(df), gender, dtype=object)
+    pts = score_table.points_batch(genders, df[e_col].to_numpy(), seconds)
+    events, times = df[e_col].to_numpy(), df[t_col].to_numpy()
+    in_window = (seconds >= cs_window[0]) & (seconds <= cs_window[1]) & np.isfinite(meters)
+
+    # sportolónkénti sorindexek egy rendezéssel
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(summary) + 1))
+
+    cs, dprime, k = summary["CS (m/s)"].to_numpy(), summary["D′ (m)"].to_numpy(), summary["Riegel k"].to_numpy()
+    preds = {t: summary[f"pred_{t}"].to_numpy() for t in (targets or ())}
+    payloads = []
+    for i, (athlete, athlete_gender) in enumerate(zip(summary["Sportoló"], summary["Nem"])):
+        idx = order[bounds[i]:bounds[i + 1]]
+        scored = idx[np.isfinite(pts[idx])]
+        scored = scored[np.argsort(-pts[scored], kind="stable")]
+        cs_idx = idx[in_window[idx]] if plots else idx[:0]
+        payloads.append({
+            "athlete": str(athlete),
+            "gender": athlete_gender,
+            "cs": {"cs": float(cs[i]), "dprime": float(dprime[i]),
+                   "x": seconds[cs_idx].tolist(), "y": meters[cs_idx].tolist()},
+            "riegel": {"k": float(k[i]), "predictions": [(t, float(p[i])) for t, p in preds.items()]},
+            "wa": [(events[j], times[j], float(pts[j])) for j in scored],
+        })
+    return payloads
+
+
+def _slug(name: str) -> str:
+    tail = name.rstrip("/").rsplit("/", 1)[-1] if "://" in name else name
+    return re.sub(r"[^\w.-]+", "_", tail, flags=re.UNICODE).strip("_")[:80] or "sportolo"
+
+
+def _render_one(job) -> tuple[str, str | None]:
+    data, path = job
+    try:
+        build_report(data, out=path)
+        return path, None
+    except Exception as e:  # egy hibás riport ne állítsa le a többit
+        return path, f"{type(e).__name__}: {e}"
+
+
+def render_reports(payloads: list[dict], out_dir, workers: int | None = None, progress=None) -> dict:
+    """
+    A riportok renderelése process poolban (workerenként egyszeri font regisztrációval).
+    `progress(done, total, path, error)` minden riport után. Visszatérés: összesítő dict.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    used = {}
+    jobs = []
+    for data in payloads:
+        slug = _slug(data.get("athlete", ""))
+        used[slug] = used.get(slug, 0) + 1
+        name = slug if used[slug] == 1 else f"{slug}_{used[slug]}"
+        jobs.append((data, str(out_dir / f"{name}.pdf")))
+
+    workers = workers or os.cpu_count() or 1
+    summary = {"total": len(jobs), "ok": 0, "failed": []}
+    t0 = time.perf_counter()
+    if workers <= 1 or len(jobs) <= 1:
+        results = map(_render_one, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=register_fonts)
+        results = pool.map(_render_one, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    try:
+        for i, (path, error) in enumerate(results, start=1):
+            if error:
+                summary["failed"].append((path, error))
+            else:
+                summary["ok"] += 1
+            if progress:
+                progress(i, len(jobs), path, error)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    summary["seconds"] = time.perf_counter() - t0
+    return summary
+
+
+# ====== CLI ======
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="PDF riportok egy roster összes sportolójáról.")
+    ap.add_argument("input", help="eredménytábla (.csv / .parquet / .xlsx), pl. a roster_scrape.py kimenete")
+    ap.add_argument("out_dir", help="kimeneti mappa (sportolónként egy PDF)")
+    ap.add_argument("--gender", default="Man", choices=["Man", "Woman"],
+                    help="nem, ha a bemenetben nincs Gender oszlop (alap: Man)")
+    ap.add_argument("--targets", nargs="*", default=DEFAULT_TARGETS, help="Riegel cél versenyszámok")
+    ap.add_argument("--workers", type=int, default=0, help="párhuzamos folyamatok (alap: CPU-k száma)")
+    ap.add_argument("--no-plots", action="store_true", help="CS ábra kihagyása (gyorsabb)")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    payloads = roster_payloads(read_table(args.input), gender=args.gender, targets=args.targets,
+                               plots=not args.no_plots)
+    print(f"Elemzés: {len(payloads)} sportoló – {time.perf_counter() - t0:.1f} mp", file=sys.stderr)
+
+    def report(i, n, path, error):
+        if error or i == n or i % 100 == 0:
+            print(f"[{i}/{n}] {path}" + (f" – HIBA {error}" if error else ""), file=sys.stderr, flush=True)
+
+    s = render_reports(payloads, args.out_dir, workers=args.workers or None, progress=report)
+    print(f"Kész: {s['ok']} riport, {len(s['failed'])} hiba – {s['seconds']:.1f} mp", file=sys.stderr)
+    return 1 if s["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
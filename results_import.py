@@ -0,0 +1,179 @@
+# results_import.py
+"""
+Eredménytörténet tömeges feltöltése (CSV / Excel).
+
+A fájlt darabokban (alap: 5000 sor) olvassuk és ellenőrizzük; minden darabon
+egy vektorizált idő-feldolgozás fut, a versenyszámokat a katalógushoz
+illesztjük (kis/nagybetű, szóköz és ezres vessző nem számít). A hibás sorok
+okkal együtt a `rejected` táblába kerülnek, az elfogadott sorok egyetlen
+IDŐK-formátumú DataFrame-ben jönnek vissza, amit a hívó egy lépésben szúr be
+(`ResultsStore.upsert_frame`).
+"""
+import csv
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis import DATE_COLS, EVENT_COLS, EVENT_TO_METERS, GENDER_COLS, TIME_COLS
+from time_parse import parse_performances
+
+CHUNK_ROWS = 5000
+# az elemző oszlopnevei + a feltöltött táblákban gyakori további fejlécek (kis/nagybetű nem számít)
+UPLOAD_EVENT_COLS = EVENT_COLS + ["Táv", "Event"]
+UPLOAD_TIME_COLS = TIME_COLS + ["Eredmény", "Mark"]
+UPLOAD_GENDER_COLS = GENDER_COLS + ["Sex"]
+SCORE_COLS = ["Score", "score", "Pont", "Points", "points", "resultScore"]
+SOURCE_COLS = ["Forrás", "Source", "source"]
+
+# átlagsebesség-korlát (m/s): ezen kívül elgépelt idő vagy rossz versenyszám
+SPEED_RANGE = (1.0, 11.0)
+
+REJ_EVENT = "ismeretlen versenyszám"
+REJ_GENDER = "ismeretlen nem"
+REJ_DATE = "hibás dátum"
+REJ_SPEED = "irreális idő a távhoz"
+
+# az egybetűs kódok a magyar jelölést követik (F = férfi, N = nő); az angol M / W / F
+# rövidítéseket szándékosan nem értelmezzük, mert az F ütközne
+_GENDERS = {
+    "man": "Man", "men": "Man", "male": "Man", "férfi": "Man", "ferfi": "Man", "f": "Man",
+    "woman": "Woman", "women": "Woman", "female": "Woman",
+    "nő": "Woman", "no": "Woman", "női": "Woman", "noi": "Woman", "n": "Woman",
+}
+
+
+def _event_key(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.lower().str.replace(",", "", regex=False) \
+        .str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def event_lookup(events) -> dict:
+    """Normalizált név -> katalógus név."""
+    names = pd.Series(list(events), dtype="string")
+    return dict(zip(_event_key(names), names))
+
+
+_METERS = dict(zip(_event_key(pd.Series(list(EVENT_TO_METERS), dtype="string")), EVENT_TO_METERS.values()))
+
+
+def _pick(columns, names: list[str]):
+    lower = {str(c).strip().lower(): c for c in columns}
+    return next((lower[n.lower()] for n in names if n.lower() in lower), None)
+
+
+# ====== Beolvasás ======
+def iter_chunks(file, name: str | None = None, chunk_rows: int = CHUNK_ROWS):
+    """
+    Fájl (útvonal vagy fájlszerű objektum, pl. Streamlit UploadedFile) darabonként,
+    minden érték szövegként. Az Excelhez az openpyxl csomag szükséges.
+    """
+    name = name or getattr(file, "name", None) or str(file)
+    if Path(name).suffix.lower() in (".xlsx", ".xlsm", ".xls"):
+        try:
+            df = pd.read_excel(file, dtype=str)
+        except ImportError as e:
+            raise RuntimeError("Excel feltöltéshez az openpyxl csomag szükséges.") from e
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    raw = file.read() if hasattr(file, "read") else Path(file).read_bytes()
+    text = raw.decode("utf-8-sig") if isinstance(raw, bytes) else raw
+    try:
+        sep = csv.Sniffer().sniff(text[:4096], delimiters=",;\t").delimiter
+    except csv.Error:
+        sep = ","
+    yield from pd.read_csv(io.StringIO(text), sep=sep, dtype=str, keep_default_na=False,
+                           na_values=[""], chunksize=chunk_rows)
+
+
+# ====== Ellenőrzés ======
+def validate_chunk(chunk: pd.DataFrame, lookup: dict, default_gender: str = "Man",
+                   source: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Egy darab ellenőrzése. Visszatérés: (elfogadott sorok IDŐK oszlopokkal,
+    elutasított sorok: Sor + eredeti oszlopok + Ok).
+    A `Sor` a fájlbeli adatsor sorszáma (1-től, a fejléc nélkül).
+    """
+    e_col = _pick(chunk.columns, UPLOAD_EVENT_COLS)
+    t_col = _pick(chunk.columns, UPLOAD_TIME_COLS)
+    if e_col is None or t_col is None:
+        raise ValueError("Hiányzó oszlop: versenyszám ("
+                         + ", ".join(UPLOAD_EVENT_COLS) + ") vagy idő (" + ", ".join(UPLOAD_TIME_COLS) + ")")
+    g_col = _pick(chunk.columns, UPLOAD_GENDER_COLS)
+    d_col = _pick(chunk.columns, DATE_COLS)
+    s_col = _pick(chunk.columns, SCORE_COLS)
+    f_col = _pick(chunk.columns, SOURCE_COLS)
+    reason = np.full(len(chunk), "", dtype=object)
+
+    def reject(mask, text):
+        nonlocal reason
+        text = np.where(mask, text, "").astype(object)
+        reason = np.where(text == "", reason, np.where(reason == "", text, reason + "; " + text))
+
+    keys = _event_key(chunk[e_col])
+    events = keys.map(lookup)
+    reject(events.isna().to_numpy(), REJ_EVENT)
+
+    parsed = parse_performances(chunk[t_col])
+    reject(~parsed["valid"].to_numpy(), ("idő: " + parsed["error"].fillna("")).to_numpy(dtype=object))
+
+    if g_col is not None:
+        g_raw = chunk[g_col].astype("string").str.strip().str.lower()
+        genders = g_raw.map(_GENDERS)
+        reject((genders.isna() & g_raw.fillna("").ne("")).to_numpy(), REJ_GENDER)
+        genders = genders.fillna(default_gender)
+    else:
+        genders = pd.Series(default_gender, index=chunk.index)
+
+    if d_col is not None:
+        d_raw = chunk[d_col].astype("string").str.strip().fillna("")
+        dates = pd.to_datetime(d_raw.where(d_raw != ""), errors="coerce", format="mixed", dayfirst=False)
+        reject((dates.isna() & (d_raw != "")).to_numpy(), REJ_DATE)
+        dates = dates.dt.strftime("%Y-%m-%d").fillna("")
+    else:
+        dates = pd.Series("", index=chunk.index)
+
+    meters = keys.map(_METERS)
+    speed = meters.to_numpy(dtype=float, na_value=np.nan) / parsed["seconds"].to_numpy()
+    with np.errstate(invalid="ignore"):
+        reject(np.isfinite(speed) & ((speed < SPEED_RANGE[0]) | (speed > SPEED_RANGE[1])), REJ_SPEED)
+
+    bad = reason != ""
+    ok = ~bad
+
+    accepted = pd.DataFrame({
+        "Versenyszám": events[ok].astype(object),
+        "Idő": chunk.loc[ok, t_col].astype("string").str.strip().astype(object),
+        "Dátum": dates[ok].astype(object),
+        "Score": pd.to_numeric(chunk.loc[ok, s_col], errors="coerce") if s_col is not None else np.nan,
+        "Gender": genders[ok].astype(object),
+        "Forrás": chunk.loc[ok, f_col].astype(object) if f_col is not None else source,
+    })
+    rejected = chunk.loc[bad].copy()
+    rejected.insert(0, "Sor", chunk.index[bad] + 1)
+    rejected["Ok"] = reason[bad]
+    return accepted.reset_index(drop=True), rejected.reset_index(drop=True)
+
+
+def import_results(file, events, name: str | None = None, default_gender: str = "Man",
+                   source: str | None = None, chunk_rows: int = CHUNK_ROWS, progress=None):
+    """
+    A teljes fájl darabonkénti ellenőrzése.
+    `progress(rows_done)` minden darab után meghívódik.
+    Visszatérés: (elfogadott sorok, elutasított sorok, összes sor).
+    """
+    lookup = event_lookup(events)
+    accepted, rejected, total = [], [], 0
+    for chunk in iter_chunks(file, name, chunk_rows):
+        ok, bad = validate_chunk(chunk, lookup, default_gender, source)
+        accepted.append(ok)
+        rejected.append(bad)
+        total += len(chunk)
+        if progress:
+            progress(total)
+    acc = pd.concat(accepted, ignore_index=True) if accepted else pd.DataFrame()
+    rej = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame()
+    return acc, rej, total
@@ -0,0 +1,211 @@
+# results_store.py
+"""
+Kulcsolt eredménytár az IDŐK táblához.
+
+Egy eredmény kulcsa: (nem, versenyszám, dátum, idő másodpercben, századra kerekítve).
+A rekordokat dict tárolja, így a beszúrás / felülírás / törlés O(1); a DataFrame
+nézet csak megjelenítéskor készül, és a következő módosításig újrahasznosul.
+Minden rekord stabil egész azonosítót kap: ez a nézet indexe, így a widget
+kulcsok (pl. kijelölő checkboxok) törlés után sem csúsznak el.
+"""
+import math
+from collections import defaultdict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from analysis import EVENT_TO_METERS
+from time_parse import parse_performances
+
+COLUMNS = ["Versenyszám", "Idő", "Dátum", "Score", "Gender", "Forrás"]
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or \
+        (not isinstance(value, (str, date)) and bool(pd.isna(value)))
+
+
+def _to_date(value):
+    if _missing(value):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    ts = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(ts) else ts.date()
+
+
+def _to_score(value):
+    if _missing(value):
+        return None
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(round(v)) if math.isfinite(v) else None
+
+
+class ResultsStore:
+    def __init__(self):
+        self._rows = {}                      # kulcs -> rekord
+        self._ids = {}                       # azonosító -> kulcs
+        self._by_event = defaultdict(set)    # (nem, versenyszám) -> kulcsok
+        self._next_id = 0
+        self._version = 0
+        self._view = (None, None)            # (verzió, DataFrame)
+
+    # ====== Kulcs ======
+    @staticmethod
+    def make_key(gender, event, seconds, when, time_str="") -> tuple:
+        t = round(float(seconds), 2) if seconds is not None and math.isfinite(seconds) else str(time_str).strip()
+        return (gender, event, when, t)
+
+    # ====== Módosítás ======
+    def upsert(self, event: str, time: str, gender: str, when=None, score=None, source=None,
+               seconds: float | None = None) -> int:
+        """Eredmény beszúrása vagy felülírása (azonos kulcsnál az azonosító megmarad). Visszatérés: azonosító."""
+        if seconds is None:
+            res = parse_performances([time]).iloc[0]
+            seconds = float(res["seconds"]) if res["valid"] else None
+        return self._put(event, str(time).strip(), gender, _to_date(when), _to_score(score),
+                         None if _missing(source) else source, seconds)
+
+    def _put(self, event, time, gender, when, score, source, seconds) -> int:
+        """Beszúrás már normalizált értékekkel (dátum: date | None, pont: int | None)."""
+        key = self.make_key(gender, event, seconds, when, time)
+        old = self._rows.get(key)
+        rec = {
+            "id": old["id"] if old else self._next_id,
+            "event": event,
+            "time": time,
+            "gender": gender,
+            "date": when,
+            "score": score if score is not None else (old["score"] if old else None),
+            "source": source if source is not None else (old["source"] if old else None),
+            "seconds": seconds,
+            "meters": EVENT_TO_METERS.get(event),
+        }
+        if old is None:
+            self._next_id += 1
+            self._ids[rec["id"]] = key
+            self._by_event[(gender, event)].add(key)
+        self._rows[key] = rec
+        self._version += 1
+        return rec["id"]
+
+    def upsert_frame(self, df: pd.DataFrame, replace_events: bool = False) -> tuple[int, int]:
+        """
+        Tömeges beszúrás egy IDŐK-szerű DataFrame-ből: az idő, dátum és pont oszlopok
+        vektorizáltan normalizálódnak, soronként csak a dict művelet marad.
+        `replace_events=True`: a bejövő (nem, versenyszám) párok korábbi eredményei törlődnek
+        (versenyszámonként egy idő; a bejövő kötegen belül is az utolsó marad).
+        Visszatérés: (új sorok, felülírt vagy elhagyott sorok).
+        """
+        if df is None or df.empty:
+            return 0, 0
+        total = len(df)
+        if replace_events:
+            df = df.drop_duplicates(subset=[c for c in ("Gender", "Versenyszám") if c in df.columns], keep="last")
+        n = len(df)
+        none = pd.Series([None] * n, index=df.index, dtype=object)
+        col = lambda name: df[name] if name in df.columns else none
+
+        parsed = parse_performances(df["Idő"].astype("string"))
+        seconds = [float(v) if ok else None for v, ok in zip(parsed["seconds"], parsed["valid"])]
+        times = df["Idő"].astype("string").str.strip().fillna("").tolist()
+        events, genders = col("Versenyszám").tolist(), col("Gender").tolist()
+
+        raw_dates = col("Dátum")
+        if pd.api.types.is_datetime64_any_dtype(raw_dates):
+            parsed_dates = raw_dates
+        else:
+            txt = raw_dates.astype("string").str.strip()
+            parsed_dates = pd.to_datetime(txt.where(txt != ""), errors="coerce", format="mixed")
+        dates = [None if pd.isna(d) else d.date() for d in parsed_dates]
+
+        pts = pd.to_numeric(col("Score"), errors="coerce").round()
+        scores = [None if not math.isfinite(p) else int(p) for p in pts.to_numpy(dtype=float, na_value=np.nan)]
+        src = col("Forrás")
+        sources = src.astype(object).where(~(src.isna() | (src.astype("string").str.strip() == "")), None).tolist()
+
+        if replace_events:
+            for pair in set(zip(genders, events)):
+                self.delete_event(*pair)
+        before = len(self._rows)
+        for row in zip(events, times, genders, dates, scores, sources, seconds):
+            self._put(*row)
+        inserted = len(self._rows) - before
+        return inserted, total - inserted
+
+    def delete(self, ids) -> int:
+        removed = 0
+        for i in ids:
+            key = self._ids.pop(int(i), None)
+            if key is None:
+                continue
+            rec = self._rows.pop(key)
+            self._by_event[(rec["gender"], rec["event"])].discard(key)
+            removed += 1
+        if removed:
+            self._version += 1
+        return removed
+
+    def delete_event(self, gender: str, event: str) -> int:
+        return self.delete([self._rows[k]["id"] for k in list(self._by_event.get((gender, event), ()))])
+
+    def clear(self) -> None:
+        self.__init__()
+
+    # ====== Lekérdezés ======
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def empty(self) -> bool:
+        return not self._rows
+
+    def records(self):
+        return iter(self._rows.values())
+
+    def frame(self, typed: bool = False) -> pd.DataFrame:
+        """
+        DataFrame nézet (index = azonosító). `typed=True` esetén a feldolgozott
+        mezők is: s (másodperc), m (méter), Dátum dátumként.
+        A nézet a következő módosításig cache-elve van: ne módosítsd helyben.
+        """
+        version, view = self._view
+        if version != self._version:
+            recs = list(self._rows.values())
+            view = pd.DataFrame({
+                "Versenyszám": [r["event"] for r in recs],
+                "Idő": [r["time"] for r in recs],
+                "Dátum": [r["date"] for r in recs],
+                "Score": pd.array([r["score"] for r in recs], dtype="Int64"),
+                "Gender": [r["gender"] for r in recs],
+                "Forrás": [r["source"] for r in recs],
+                "s": np.array([np.nan if r["seconds"] is None else r["seconds"] for r in recs], dtype=float),
+                "m": np.array([np.nan if r["meters"] is None else r["meters"] for r in recs], dtype=float),
+            }, index=pd.Index([r["id"] for r in recs], dtype="int64"))
+            self._view = (self._version, view)
+        if typed:
+            return view
+        out = view[COLUMNS].copy()
+        out["Dátum"] = [d.isoformat() if d else "" for d in out["Dátum"]]
+        return out
+
+
+def session_store(state, key: str = "idok") -> ResultsStore:
+    """
+    A session eredménytára. Ha a kulcs alatt még régi formátumú DataFrame áll
+    (pl. korábbi munkamenet vagy teszt), azt egyszer átemeli a tárba.
+    """
+    current = state.get(key) if hasattr(state, "get") else None
+    if isinstance(current, ResultsStore):
+        return current
+    store = ResultsStore()
+    if isinstance(current, pd.DataFrame) and not current.empty:
+        store.upsert_frame(current)
+    state[key] = store
+    return store
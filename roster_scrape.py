@@ -0,0 +1,285 @@
+# roster_scrape.py
+"""
+Csapat (roster) PB-k tömeges letöltése.
+
+Bemenet: WA profil URL-ek fájlja (soronként egy URL, '#' megjegyzés; vagy CSV egy
+'url' oszloppal). A profilokat párhuzamosan töltjük le (korlátozott számú worker,
+hostonkénti kérés-ütemezés), és minden sportoló eredményét azonnal kiírjuk
+CSV-be vagy Parquet-be (Parquet-nél sportolónként egy lezárt részfájlba, amelyeket a
+futás végén egyesítünk). A kész URL-ek egy checkpoint fájlba kerülnek, így egy
+megszakított futás ugyanazzal a paranccsal folytatható; folytatáskor a kimenetből
+eldobjuk a checkpointban nem szereplő sportolók sorait (kiírás után, de a checkpoint
+előtt megszakadt futás), így nem lesz duplikátum.
+
+A HTTP letöltések `workers` szálon futnak, a Selenium tartalék viszont legfeljebb a
+driver pool méretével (WA_DRIVER_POOL_SIZE) párhuzamosan, hogy a szálak ne a pool
+kiadási időkorlátján akadjanak el.
+
+    python roster_scrape.py roster.txt pbs.csv --workers 8 --rate 2
+"""
+import argparse
+import csv
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from get_pb import get_driver_pool, get_personal_bests
+from pb_cache import canonical_url, get_pb_cache
+
+COLUMNS = ["URL", "Discipline", "Performance", "Date", "Score"]
+
+
+# ====== Bemenet ======
+def read_urls(path) -> list[str]:
+    """URL lista beolvasása (duplikátumok nélkül, a sorrendet megtartva)."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            col = next((c for c in reader.fieldnames or [] if "url" in c.lower()),
+                       (reader.fieldnames or [None])[0])
+            raw = [row.get(col) or "" for row in reader]
+    else:
+        raw = path.read_text(encoding="utf-8").splitlines()
+    seen, urls = set(), []
+    for line in raw:
+        url = line.split("#", 1)[0].strip()
+        if url and canonical_url(url) not in seen:
+            seen.add(canonical_url(url))
+            urls.append(url)
+    return urls
+
+
+# ====== Hostonkénti ütemezés ======
+class HostRateLimiter:
+    """Hostonként legfeljebb `rate` kérés másodpercenként (egyenletesen elosztva)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ====== Kimenet ======
+def _finished(url, keep: set) -> bool:
+    return bool(url) and canonical_url(url) in keep
+
+
+def _prune_csv(path: Path, keep: set) -> None:
+    """A checkpointban nem szereplő sportolók sorainak törlése (csak ha van ilyen)."""
+    with path.open(newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    kept = [r for r in rows if _finished(r.get("URL"), keep)]
+    if len(kept) == len(rows):
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(kept)
+    tmp.replace(path)
+
+
+class _CsvSink:
+    def __init__(self, path: Path, append: bool, keep: set | None = None):
+        if append and keep is not None and path.exists() and path.stat().st_size > 0:
+            _prune_csv(path, keep)
+        new = not (append and path.exists() and path.stat().st_size > 0)
+        self._f = path.open("a" if not new else "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=COLUMNS, extrasaction="ignore")
+        if new:
+            self._w.writeheader()
+
+    def write(self, rows: list[dict]) -> None:
+        self._w.writerows(rows)
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _ParquetSink:
+    """
+    Sportolónként egy kész (lezárt) részfájl a `<kimenet>.parts/` mappában, így a checkpoint
+    csak tartósan kiírt adatra mutat; lezáráskor a részek a korábbi kimenettel együtt egy
+    fájlba kerülnek. Folytatáskor a megszakadt futás részeit is átvesszük.
+    """
+
+    def __init__(self, path: Path, append: bool, keep: set | None = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet kimenethez a pyarrow csomag szükséges.") from e
+        self._pa, self._pq = pa, pq
+        self._schema = pa.schema([(c, pa.string()) for c in COLUMNS])
+        self._path = path
+        self._parts = path.with_name(path.name + ".parts")
+        if not append and self._parts.exists():
+            shutil.rmtree(self._parts)
+        self._parts.mkdir(parents=True, exist_ok=True)
+        self._keep = keep if append else None
+        self._previous = pq.read_table(path) if append and path.exists() else None
+        self._recovered = sorted(self._parts.glob("*.parquet"))  # megszakadt futás részei
+        self._seq = len(self._recovered)
+
+    def write(self, rows: list[dict]) -> None:
+        cols = {c: [None if r.get(c) is None else str(r.get(c)) for r in rows] for c in COLUMNS}
+        part = self._parts / f"{self._seq:06d}.parquet"
+        tmp = part.with_suffix(".tmp")
+        self._pq.write_table(self._pa.table(cols, schema=self._schema), tmp)
+        tmp.replace(part)  # a rész vagy teljes, vagy nincs
+        self._seq += 1
+
+    def _filtered(self, table):
+        if self._keep is None:
+            return table
+        keep = [_finished(u, self._keep) for u in table.column("URL").to_pylist()]
+        return table.filter(self._pa.array(keep, type=self._pa.bool_()))
+
+    def close(self) -> None:
+        # korábbi adat: csak a checkpointban szereplő sportolók (kiírás után, checkpoint előtt
+        # megszakadt futás sorai kiesnek); az e futásban írt részek mind kellenek
+        old = ([self._previous] if self._previous is not None else []) + \
+              [self._pq.read_table(p) for p in self._recovered]
+        new = [self._pq.read_table(p) for p in sorted(set(self._parts.glob("*.parquet")) - set(self._recovered))]
+        tables = [self._filtered(t.select(COLUMNS).cast(self._schema)) for t in old]
+        tables += [t.select(COLUMNS).cast(self._schema) for t in new]
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        self._pq.write_table(self._pa.concat_tables(tables) if tables else self._schema.empty_table(), tmp)
+        tmp.replace(self._path)
+        shutil.rmtree(self._parts, ignore_errors=True)
+
+
+def _open_sink(path: Path, append: bool, keep: set | None = None):
+    """`keep`: folytatáskor csak ezeknek a (kanonikus) URL-eknek a sorai maradnak meg."""
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return _ParquetSink(path, append, keep)
+    return _CsvSink(path, append, keep)
+
+
+def checkpoint_path(out_path) -> Path:
+    out_path = Path(out_path)
+    return out_path.with_name(out_path.name + ".done")
+
+
+# ====== API ======
+def scrape_roster(urls, out_path, workers: int = 8, rate: float = 2.0, wait_sec: int = 45,
+                  resume: bool = True, force: bool = False, progress=None) -> dict:
+    """
+    A roster PB-inek letöltése és folyamatos kiírása.
+    `progress(done, total, url, n_rows, error)` minden sportoló után meghívódik.
+    Letöltési hiba, vagy sikertelen frissítés (csak elavult cache adat) esetén a sportoló a
+    `failed` listába kerül, nem íródik ki, és folytatáskor újra próbáljuk.
+    Visszatérés: összesítő dict (total, skipped, ok, empty, failed, rows, seconds).
+    """
+    out_path = Path(out_path)
+    ckpt = checkpoint_path(out_path)
+    done = set()
+    if resume and ckpt.exists():
+        done = {line.strip() for line in ckpt.read_text(encoding="utf-8").splitlines() if line.strip()}
+    elif ckpt.exists():
+        ckpt.unlink()
+    todo = [u for u in urls if canonical_url(u) not in done]
+
+    limiter = HostRateLimiter(rate)
+    cache = get_pb_cache()
+    # a böngészős tartalékból nem indulhat több, mint ahány driver a poolban van
+    selenium_slots = threading.BoundedSemaphore(get_driver_pool().size)
+
+    def fetch(url):
+        limiter.wait(url)  # csak a tényleges letöltést ütemezzük, a cache találatot nem
+        return get_personal_bests(url, wait_sec=wait_sec, selenium_slots=selenium_slots)
+
+    def job(url):
+        # letöltési hiba mentett adat nélkül kivételként jön; mentett adattal 'stale-error'
+        rows, source = cache.fetch(url, fetch, force=force)
+        if source == "stale-error":
+            raise RuntimeError("a frissítés nem sikerült (csak korábban mentett PB-k vannak)")
+        return rows
+
+    summary = {"total": len(urls), "skipped": len(urls) - len(todo), "ok": 0, "empty": 0,
+               "failed": [], "rows": 0}
+    t0 = time.perf_counter()
+    sink = _open_sink(out_path, append=resume and bool(done), keep=done)
+    try:
+        with ckpt.open("a", encoding="utf-8") as ckpt_f, \
+                ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="roster") as pool:
+            futures = {pool.submit(job, url): url for url in todo}
+            try:
+                for i, fut in enumerate(as_completed(futures), start=1):
+                    url = futures[fut]
+                    error = None
+                    try:
+                        rows = fut.result()
+                    except Exception as e:
+                        rows, error = [], f"{type(e).__name__}: {e}"
+                    if error:
+                        summary["failed"].append((url, error))
+                    elif rows:
+                        sink.write([{"URL": url, **r} for r in rows])
+                        ckpt_f.write(canonical_url(url) + "\n")
+                        ckpt_f.flush()
+                        summary["ok"] += 1
+                        summary["rows"] += len(rows)
+                    else:
+                        # üres eredményt nem jelölünk késznek: folytatáskor újra próbáljuk
+                        summary["empty"] += 1
+                    if progress:
+                        progress(i, len(todo), url, len(rows), error)
+            except KeyboardInterrupt:
+                # a kiírt sportolók már a checkpointban vannak, a többit a következő futás pótolja
+                for fut in futures:
+                    fut.cancel()
+                summary["interrupted"] = True
+    finally:
+        sink.close()
+    summary["seconds"] = time.perf_counter() - t0
+    return summary
+
+
+# ====== CLI ======
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="WA PB-k tömeges letöltése URL listából.")
+    ap.add_argument("urls", help="URL lista (.txt soronként egy URL, vagy .csv 'url' oszloppal)")
+    ap.add_argument("out", help="kimenet: .csv vagy .parquet")
+    ap.add_argument("--workers", type=int, default=8, help="párhuzamos letöltések száma (alap: 8)")
+    ap.add_argument("--rate", type=float, default=2.0, help="kérés / mp / host (0 = korlátlan, alap: 2)")
+    ap.add_argument("--wait", type=int, default=45, help="oldalbetöltési időkorlát mp-ben (alap: 45)")
+    ap.add_argument("--restart", action="store_true", help="checkpoint figyelmen kívül hagyása, elölről kezdés")
+    ap.add_argument("--force", action="store_true", help="PB cache kihagyása")
+    args = ap.parse_args(argv)
+
+    urls = read_urls(args.urls)
+
+    def report(i, n, url, n_rows, error):
+        status = f"HIBA {error}" if error else f"{n_rows} PB"
+        print(f"[{i}/{n}] {url} – {status}", file=sys.stderr, flush=True)
+
+    s = scrape_roster(urls, args.out, workers=args.workers, rate=args.rate, wait_sec=args.wait,
+                      resume=not args.restart, force=args.force, progress=report)
+    print(f"Kész: {s['ok']} sportoló, {s['rows']} sor, {s['skipped']} korábban kész, "
+          f"{s['empty']} üres, {len(s['failed'])} hiba – {s['seconds']:.1f} mp", file=sys.stderr)
+    if s.get("interrupted"):
+        print("Megszakítva – ugyanazzal a paranccsal folytatható.", file=sys.stderr)
+        return 130
+    return 1 if s["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
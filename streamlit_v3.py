@@ -4,10 +4,16 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
-from get_pb import scrape_world_athletics_pbs  # <<< közvetlen import
+from get_pb import get_personal_bests_cached  # cache -> HTTP -> Selenium
+from profiler import page_profiler
+from results_import import import_results
+from results_store import session_store
+from time_parse import parse_performance, to_seconds
+from wa_scores import load_score_table
 
 # ====== Oldal beállítás ======
 st.set_page_config(page_title="Futó teljesítmény – Adatbetöltés", page_icon="🏃‍♂️", layout="wide")
+prof = page_profiler("Adatbetöltés")  # WA_PROFILE=1 vagy ?profile=1: szakaszidők az oldal alján
 
 # ====== Stílus ======
 st.markdown("""
@@ -47,47 +53,44 @@ if "gender" not in st.session_state: st.session_state.gender = "Man"
 if "wa_kartyak" not in st.session_state: st.session_state.wa_kartyak = []
 if "manual_kartyak" not in st.session_state:
     st.session_state.manual_kartyak = [{"Táv":"", "Eredmény":"", "Használat":True} for _ in range(2)]
-if "idok" not in st.session_state:
-    st.session_state.idok = pd.DataFrame(columns=["Versenyszám","Idő","Dátum","Score","Gender","Forrás"])
-if "wa_scores_df" not in st.session_state:
-    try:
-        st.session_state.wa_scores_df = pd.read_csv("wa_score_merged_standardized.csv")
-    except Exception:
-        pass
+idok_store = session_store(st.session_state)  # st.session_state.idok: kulcsolt eredménytár
 
 # ====== Pontkereső segédfv. ======
-def parse_time_to_seconds(time_str):
-    try:
-        if time_str is None:
-            return None
-        t = str(time_str).replace(",", ".").strip()
-        parts = t.split(":")
-        if len(parts) == 3: h, m, s = parts
-        elif len(parts) == 2: h, m, s = 0, *parts
-        else: h, m, s = 0, 0, parts[0]
-        return int(h) * 3600 + int(m) * 60 + float(s)
-    except:
-        return None
-
 def pontkereso(gender, discipline, input_time):
-    if "wa_scores_df" not in st.session_state:
+    try:
+        table = load_score_table()
+    except Exception:
         return None
-    wa = st.session_state.wa_scores_df.copy()
-    wa = wa[(wa["gender"] == gender) & (wa["discipline"] == discipline)]
-    if wa.empty: return None
-    wa["time_seconds"] = wa["result"].apply(parse_time_to_seconds)
-    input_sec = parse_time_to_seconds(input_time)
+    input_sec = parse_performance(input_time)
     if input_sec is None: return None
-    wa = wa[wa["time_seconds"] >= input_sec]
-    if wa.empty: return None
-    closest = wa.sort_values("time_seconds").iloc[0]
-    try: return int(closest["score"])
-    except: return None
-
-# ====== WA scraping közvetlenül Seleniummal ======
-def get_personal_bests_direct(url: str, timeout=60):
+    return table.points_for(gender, discipline, input_sec, clamp=False)
+
+def pontozas(df):
+    """Hiányzó Score értékek kitöltése egyetlen batch pontozással (Versenyszám, Idő, Gender)."""
+    missing = df["Score"].isna() | (df["Score"].astype(str).str.strip() == "")
+    if not missing.any():
+        return df
+    with prof.section("WA pontozás"):
+        try:
+            table = load_score_table()
+        except Exception:
+            return df
+        sub = df.loc[missing]
+        pts = table.points_batch(sub["Gender"].to_numpy(), sub["Versenyszám"].to_numpy(),
+                                 to_seconds(sub["Idő"]), clamp=False)
+    df = df.copy()
+    df["Score"] = df["Score"].astype(object)
+    df.loc[missing, "Score"] = [int(p) if p == p else None for p in pts]
+    return df
+
+# ====== WA PB-k (HTTP, szükség esetén Selenium) ======
+def get_personal_bests_direct(url: str, timeout=60, force=False):
     try:
-        rows = scrape_world_athletics_pbs(url.strip(), wait_sec=timeout)
+        rows, source = get_personal_bests_cached(url.strip(), wait_sec=timeout, force=force)
+        if source == "stale":
+            st.caption("Korábban mentett PB-k – a frissítés a háttérben fut.")
+        elif source == "stale-error":
+            st.warning("A PB-k frissítése nem sikerült – a korábban mentett adatokat mutatjuk.")
         if not isinstance(rows, list) or len(rows) == 0:
             return None
         df = pd.DataFrame(rows)
@@ -121,19 +124,20 @@ col1, col2 = st.columns([1,1], gap="large")
 
 # --- WA PB kártya (Personal bests) ---
 with col1:
-    with st.container(border=True):
+    with st.container(border=True), prof.section("WA PB kártyák"):
         st.markdown("<h3>World Athletics PB-k (Personal bests)</h3>"
                     "<div class='hint'>Illeszd be a WA profil linket, a betöltés csak a listában szereplő versenyszámokra történik.</div>",
                     unsafe_allow_html=True)
 
         wa_url = st.text_input("World Athletics profil link", key="wa_url")
+        wa_force = st.checkbox("Frissítés kényszerítése (cache kihagyása)", key="wa_force")
 
         if st.button("PB-k betöltése", type="primary"):
             if not wa_url.strip():
                 st.error("Adj meg egy érvényes WA linket.")
             else:
-                with st.spinner("PB-k letöltése Seleniummal…"):
-                    wa_df = get_personal_bests_direct(wa_url, timeout=60)
+                with st.spinner("PB-k letöltése…"), prof.section("PB letöltés (cache / HTTP / Selenium)"):
+                    wa_df = get_personal_bests_direct(wa_url, timeout=60, force=wa_force)
 
                 if wa_df is not None and "Discipline" in wa_df.columns:
                     wa_tbl = wa_df[wa_df["Discipline"].isin(EVENT_OPTIONS)].copy()
@@ -184,14 +188,13 @@ with col1:
                         "Forrás": "World Athletics"
                     })
                 if rows:
-                    add_df = pd.DataFrame(rows)
-                    st.session_state.idok = pd.concat([st.session_state.idok, add_df], ignore_index=True)
-                    st.session_state.idok.drop_duplicates(subset=["Versenyszám","Idő","Dátum","Gender"], inplace=True, keep="first")
-                    st.success(f"Hozzáadva {len(add_df)} sor.")
+                    add_df = pontozas(pd.DataFrame(rows))
+                    uj, _ = idok_store.upsert_frame(add_df)
+                    st.success(f"Hozzáadva {uj} új sor ({len(add_df) - uj} már szerepelt).")
 
 # --- Manuális bevitel ---
 with col2:
-    with st.container(border=True):
+    with st.container(border=True), prof.section("Manuális kártyák"):
         st.markdown("<h3>Manuális bevitel</h3>"
                     "<div class='hint'>Válaszd ki a versenyszámot a listából, add meg az időt, majd add hozzá az IDŐK táblához.</div>",
                     unsafe_allow_html=True)
@@ -226,17 +229,49 @@ with col2:
                             "Gender": st.session_state.gender, "Forrás":"Manuális"
                         })
                 if rows:
-                    add_df = pd.DataFrame(rows)
-                    st.session_state.idok = pd.concat([st.session_state.idok, add_df], ignore_index=True)
-                    st.session_state.idok.drop_duplicates(subset=["Versenyszám","Idő","Dátum","Gender"], inplace=True, keep="first")
-                    st.success(f"Hozzáadva {len(add_df)} sor.")
+                    add_df = pontozas(pd.DataFrame(rows))
+                    uj, _ = idok_store.upsert_frame(add_df)
+                    st.success(f"Hozzáadva {uj} új sor ({len(add_df) - uj} már szerepelt).")
+
+st.markdown('<hr class="soft" />', unsafe_allow_html=True)
+
+# ====== Eredménylista feltöltése ======
+with st.container(border=True), prof.section("Eredménylista feltöltése"):
+    st.markdown("<h3>Eredménylista feltöltése (CSV / Excel)</h3>"
+                "<div class='hint'>Oszlopok: Versenyszám, Idő, opcionálisan Dátum, Gender, Score. "
+                "A hibás sorokat okkal együtt kilistázzuk, a többi egy lépésben kerül az IDŐK táblába.</div>",
+                unsafe_allow_html=True)
+    feltoltes = st.file_uploader("Eredményfájl", type=["csv", "txt", "xlsx", "xls"], key="upload_file")
+    if feltoltes is not None and st.button("Feltöltés feldolgozása", type="primary"):
+        bar = st.progress(0.0, text="Ellenőrzés…")
+        becsult = max(1, feltoltes.size // 24)  # durva sorbecslés a folyamatjelzőhöz
+        try:
+            ok_df, hibas_df, osszes = import_results(
+                feltoltes, EVENT_OPTIONS, name=feltoltes.name, default_gender=st.session_state.gender,
+                source=f"Feltöltés: {feltoltes.name}",
+                progress=lambda n: bar.progress(min(1.0, n / becsult), text=f"Ellenőrzés… {n} sor"))
+        except (ValueError, RuntimeError) as e:
+            bar.empty()
+            st.error(str(e))
+        else:
+            bar.empty()
+            uj, meglevo = idok_store.upsert_frame(pontozas(ok_df)) if not ok_df.empty else (0, 0)
+            st.success(f"{osszes} sorból {len(ok_df)} elfogadva: {uj} új, {meglevo} már szerepelt.")
+            if not hibas_df.empty:
+                with st.expander(f"Elutasított sorok ({len(hibas_df)})", expanded=len(hibas_df) <= 20):
+                    st.dataframe(hibas_df.head(1000), use_container_width=True, hide_index=True)
+                    st.download_button("Elutasított sorok letöltése (CSV)",
+                                       hibas_df.to_csv(index=False).encode("utf-8"),
+                                       file_name="elutasitott_sorok.csv", mime="text/csv")
 
 st.markdown('<hr class="soft" />', unsafe_allow_html=True)
 
 # ====== Összesített tábla ======
-with st.container(border=True):
+with st.container(border=True), prof.section("Összesített tábla"):
     st.markdown("<h3>Összesített IDŐK táblázat</h3>", unsafe_allow_html=True)
-    if not st.session_state.idok.empty:
-        st.dataframe(st.session_state.idok, use_container_width=True, hide_index=True)
+    if not idok_store.empty:
+        st.dataframe(idok_store.frame(), use_container_width=True, hide_index=True)
     else:
         st.info("Még nincs adat a táblában.")
+
+prof.render()
@@ -0,0 +1,138 @@
+# time_parse.py
+"""
+Közös, vektorizált teljesítmény-string parser (idő -> másodperc).
+
+Formátumok: 'ss.ss', 'mm:ss.ss', 'hh:mm:ss(.ss)', tizedesvesszővel is.
+A WA profilok jelöléseit (pl. 'h', 'i', 'A', '+', '(NR)', '*') levágjuk és
+a `flags` oszlopban adjuk vissza. A hibás értékek nem csendben NaN-ok:
+a `valid` és `error` oszlop megmondja, mi volt velük a baj.
+
+A tényleges számolás egy bájtmátrixon fut (soronként egy string, oszloponként
+egy karakter), így a teljes WA ponttábla is néhány tíz ms alatt feldolgozható.
+"""
+import numpy as np
+import pandas as pd
+
+ERR_EMPTY = "üres"
+ERR_FORMAT = "hibás formátum"
+ERR_RANGE = "érvénytelen perc/másodperc"
+
+_CLEAN = r"^[\d:.,\s]*$"
+_PAREN = r"\(([^)]*)\)"
+_TRAILING_FLAGS = r"([A-Za-z+*#]+)$"
+
+_COLON, _DOT, _COMMA, _SPACE = ord(":"), ord("."), ord(","), ord(" ")
+
+
+def _strip_annotations(raw: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Zárójeles és záró jelölések levágása; (tiszta szöveg, jelölések)."""
+    paren = raw.str.findall(_PAREN).str.join(" ")
+    txt = raw.str.replace(_PAREN, "", regex=True).str.strip()
+    trailing = txt.str.extract(_TRAILING_FLAGS, expand=False).fillna("")
+    txt = txt.str.replace(_TRAILING_FLAGS, "", regex=True)
+    return txt, (paren + " " + trailing).str.strip()
+
+
+def _parse_bytes(txt: pd.Series) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bájtmátrixos állapotgép. Visszatérés: (seconds, formátum hiba, tartomány hiba)."""
+    n = len(txt)
+    b = np.array(txt.str.encode("ascii", errors="replace").tolist(), dtype=bytes)
+    width = b.dtype.itemsize
+    if n == 0 or width == 0:
+        return np.full(n, np.nan), np.ones(n, bool), np.zeros(n, bool)
+    chars = b.view(np.uint8).reshape(n, width)
+
+    total = np.zeros(n)        # lezárt komponensek (h, m) másodpercben
+    cur = np.zeros(n)          # aktuális egész rész
+    frac = np.zeros(n)         # tizedes jegyek egészként, 10**nfrac nevezővel
+    nfrac = np.zeros(n)
+    ndig = np.zeros(n, np.int8)
+    colons = np.zeros(n, np.int8)
+    in_frac = np.zeros(n, bool)
+    last_digit = np.zeros(n, bool)  # az utolsó nem-szóköz karakter számjegy volt
+    spaced = np.zeros(n, bool)      # számjegy után szóköz jött, elválasztó nélkül
+    bad = np.zeros(n, bool)
+    out_of_range = np.zeros(n, bool)
+
+    for c in chars.T:
+        digit = (c >= 48) & (c <= 57)
+        d = c.astype(float) - 48
+        colon = c == _COLON
+        dot = (c == _DOT) | (c == _COMMA)
+        space = c == _SPACE
+        skip = (c == 0) | space
+
+        # szóköz csak a szélen vagy ':' / '.' mellett állhat, két számjegy közt nem ("12 34")
+        bad |= digit & spaced
+        spaced = np.where(space, spaced | last_digit, spaced & ~(digit | colon | dot))
+        last_digit = np.where(skip, last_digit, digit)
+
+        fd = digit & in_frac
+        frac = np.where(fd, frac * 10 + d, frac)
+        nfrac = nfrac + fd
+        idig = digit & ~in_frac
+        cur = np.where(idig, cur * 10 + d, cur)
+        ndig = np.where(idig, ndig + 1, ndig)
+
+        bad |= colon & (in_frac | (ndig == 0) | (colons >= 2))
+        bad |= dot & (in_frac | (ndig == 0))
+        bad |= ~(digit | colon | dot | skip)
+        # perc komponens (bármelyik ':' utáni, de nem utolsó rész) < 60
+        out_of_range |= colon & (colons >= 1) & (cur >= 60)
+        total = np.where(colon, (total + cur) * 60, total)
+        cur = np.where(colon, 0, cur)
+        ndig = np.where(colon, 0, ndig)
+        colons = colons + colon
+        in_frac |= dot
+
+    bad |= ndig == 0
+    out_of_range |= (colons >= 1) & (cur >= 60)
+    # egyetlen osztás egész számokon: ugyanazt a float-ot adja, mint a float("61.23")
+    denom = 10.0 ** nfrac
+    seconds = ((total + cur) * denom + frac) / denom
+    out_of_range |= seconds <= 0
+    return seconds, bad, out_of_range & ~bad
+
+
+def parse_performances(values) -> pd.DataFrame:
+    """
+    Teljes oszlop feldolgozása egy hívásban.
+    Visszatérés: DataFrame (a bemenet indexével) oszlopai:
+    seconds (float, NaN ha hibás), valid (bool), flags (str), error (str | None).
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(np.asarray(values, dtype=object))
+    raw = s.astype("string").str.strip().fillna("")
+
+    txt = raw.copy()
+    flags = pd.Series("", index=s.index, dtype=object)
+    dirty = ~raw.str.match(_CLEAN).fillna(False).to_numpy(dtype=bool)
+    if dirty.any():
+        t_dirty, f_dirty = _strip_annotations(raw[dirty])
+        txt[dirty] = t_dirty
+        flags[dirty] = f_dirty.astype(object)
+
+    seconds, bad_format, bad_range = _parse_bytes(txt)
+    empty = (raw == "").to_numpy()
+    bad_format &= ~empty
+    bad_range &= ~empty
+    valid = ~(empty | bad_format | bad_range)
+    seconds[~valid] = np.nan
+
+    error = np.select([empty, bad_format, bad_range], [ERR_EMPTY, ERR_FORMAT, ERR_RANGE], default="")
+    return pd.DataFrame({
+        "seconds": seconds,
+        "valid": valid,
+        "flags": flags.to_numpy(),
+        "error": pd.Series(np.where(error == "", None, error), index=s.index, dtype=object),
+    }, index=s.index)
+
+
+def to_seconds(values) -> np.ndarray:
+    """Csak a másodperc tömb (NaN a hibás értékeknél)."""
+    return parse_performances(values)["seconds"].to_numpy()
+
+
+def parse_performance(value) -> float | None:
+    """Skalár kényelmi változat: másodperc, vagy None ha az érték hibás."""
+    res = parse_performances([value]).iloc[0]
+    return float(res["seconds"]) if res["valid"] else None
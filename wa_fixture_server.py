@@ -0,0 +1,58 @@
+# wa_fixture_server.py
+"""
+Lokális HTTP stand-in a World Athletics profiloldalakhoz.
+
+A `fixtures/wa/<slug>.html` fájlokat szolgálja ki bármely `/.../<slug>` útvonalon,
+így a böngésző nélküli PB betöltés (`get_pb.fetch_pbs_http`) hálózat nélkül is
+tesztelhető és mérhető:
+
+    python wa_fixture_server.py            # -> http://127.0.0.1:<port>/athletes/hungary/minta-atleta-next-data
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "wa"
+
+
+def _make_handler(directory: Path):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, mint az éles oldalon
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            slug = urlsplit(self.path).path.rstrip("/").rsplit("/", 1)[-1]
+            page = directory / f"{slug}.html"
+            if not slug or not page.is_file():
+                self.send_error(404)
+                return
+            body = page.read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return _Handler
+
+
+def serve(directory: str | Path = FIXTURE_DIR, port: int = 0):
+    """Háttérszálon indított szerver; visszatérés: (server, base_url). Leállítás: server.shutdown()."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(Path(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server, base = serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+    for page in sorted(FIXTURE_DIR.glob("*.html")):
+        print(f"{base}/athletes/hungary/{page.stem}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,356 @@
+# wa_formula.py
+"""
+Zárt alakú WA pontszámítás versenyszámonkénti másodfokú együtthatókkal.
+
+A WA táblák versenyszámonként egy P(t) = a·x² + b·x + c (x = (t - mu) / sd)
+képletből készülnek, a pont lefelé kerekítve. A `fit` parancs ezeket az
+együtthatókat illeszti a `wa_score_merged_standardized.csv`-re (lineáris
+programként: minden rácspontban floor(P(t)) egyezzen a táblás kereséssel),
+és a `wa_score_coefficients.json`-ba írja. Ahol a CSV-ből sorok hiányoznak,
+a képlet és a tábla néhány rácspontban eltérhet; ezeket kivételként tároljuk,
+így a táblatartományon belül a modell pontosan a táblát adja vissza.
+
+Futásidőben csak a JSON kell (néhány száz float), a tábla nem: WA_SCORE_BACKEND=formula
+mellett a `wa_scores.load_score_table` ezt a modellt adja a tábla helyett. A JSON a
+forrás CSV sha256-ját is tárolja; ha a CSV elérhető és eltér, a betöltés hibát dob
+(elavult együtthatók csendben rossz pontot adnának).
+
+    python wa_formula.py fit        # illesztés + validációs riport (scipy kell hozzá)
+    python wa_formula.py validate   # a mentett együtthatók ellenőrzése a táblán
+"""
+import functools
+import hashlib
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from wa_scores import WA_CSV, ScoreTable, _event_groups, _read_table
+
+WA_COEFFICIENTS = Path(__file__).resolve().parent / "wa_score_coefficients.json"
+
+_FIELDS = ["mu", "sd", "a", "b", "c", "res", "t_min", "t_max", "p_min", "p_max"]
+
+
+def _grid(t_min: float, t_max: float, res: float) -> np.ndarray:
+    return np.arange(round(t_min / res), round(t_max / res) + 1, dtype=np.int64)
+
+
+def _grid_seconds(k: np.ndarray, res: float) -> np.ndarray:
+    return np.round(k * res, 2)
+
+
+class ScoreModel:
+    """
+    A `ScoreTable`-lel azonos felületű pontozó, táblázat helyett együtthatókból.
+
+    `extrapolate=False` mellett a táblatartományon belül pontosan a táblás keresést
+    adja, a széleken ugyanúgy vág, mint a `ScoreTable` (`clamp=False`: a táblánál
+    lassabb időre NaN / None); `extrapolate=True` esetén a képletet a tartományon
+    kívül is kiértékeli (min. 0 pont).
+    """
+
+    def __init__(self, events: dict, source_sha256: str | None = None):
+        self._events = events  # (gender, discipline) -> paraméter dict (+ "exc_k", "exc_p" tömbök)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_json(cls, path: str | Path = WA_COEFFICIENTS, csv_path: str | Path | None = WA_CSV,
+                  expected_sha256: str | None = None) -> "ScoreModel":
+        """
+        Együtthatók betöltése. A tárolt `source_sha256`-ot összevetjük az `expected_sha256`-tal,
+        ennek híján a `csv_path` tartalmával (ha a fájl létezik); eltérésnél ValueError.
+        """
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        source = data.get("source_sha256")
+        if expected_sha256 is None and csv_path is not None and Path(csv_path).is_file():
+            expected_sha256 = hashlib.sha256(Path(csv_path).read_bytes()).hexdigest()
+        if expected_sha256 is not None and source != expected_sha256:
+            raise ValueError(f"Elavult WA együtthatók ({Path(path).name}): a ponttábla CSV megváltozott, "
+                             "futtasd újra: python wa_formula.py fit")
+        events = {}
+        for ev in data["events"]:
+            params = {f: float(ev[f]) for f in _FIELDS}
+            exc = np.array(ev.get("exceptions", []), dtype=np.int64).reshape(-1, 2)
+            params["exc_k"], params["exc_p"] = exc[:, 0], exc[:, 1]
+            events[(ev["gender"], ev["discipline"])] = params
+        return cls(events, source)
+
+    def events(self, gender: str | None = None) -> list[str]:
+        return sorted({d for g, d in self._events if gender is None or g == gender})
+
+    # ====== Előre: idő -> pont ======
+    @staticmethod
+    def _raw_points(ev: dict, t: np.ndarray) -> np.ndarray:
+        x = (t - ev["mu"]) / ev["sd"]
+        pts = (ev["a"] * x + ev["b"]) * x + ev["c"]
+        # a parabola csúcsán túl (lassabb időknél) már nem csökkenne a pont
+        past_vertex = (2 * ev["a"] * x + ev["b"]) >= 0
+        return np.where(past_vertex, 0.0, np.maximum(np.floor(pts), 0.0))
+
+    def _points(self, ev: dict, t: np.ndarray, extrapolate: bool, clamp: bool = True) -> np.ndarray:
+        res = ev["res"]
+        # a táblás keresés az első >= időt adja: felfelé kerekítünk a tábla felbontására
+        # (a felbontás ezredén belüli eltérés zajnak számít, ahogy a float32 táblánál is)
+        k = np.ceil(np.round(t / res, 3)).astype(np.int64)
+        k_max = round(ev["t_max"] / res)
+        too_slow = k > k_max
+        if not extrapolate:
+            k = np.clip(k, round(ev["t_min"] / res), k_max)
+        pts = self._raw_points(ev, _grid_seconds(k, res))
+        if len(ev["exc_k"]):
+            i = np.clip(np.searchsorted(ev["exc_k"], k), 0, len(ev["exc_k"]) - 1)
+            hit = ev["exc_k"][i] == k
+            pts = np.where(hit, ev["exc_p"][i], pts)
+        if not clamp and not extrapolate:
+            pts = np.where(too_slow, np.nan, pts)
+        return pts
+
+    def points_for(self, gender: str, discipline: str, seconds: float, clamp: bool = True,
+                   extrapolate: bool = False) -> int | None:
+        ev = self._events.get((gender, discipline))
+        if ev is None or seconds is None or not np.isfinite(seconds):
+            return None
+        p = self._points(ev, np.array([seconds], dtype=float), extrapolate, clamp)[0]
+        return int(p) if np.isfinite(p) else None
+
+    def points_batch(self, gender, discipline, seconds, clamp: bool = True, extrapolate: bool = False) -> np.ndarray:
+        seconds = np.asarray(seconds, dtype=float).reshape(-1)
+        out = np.full(len(seconds), np.nan)
+        for key, rows in _event_groups(gender, discipline, len(seconds)):
+            ev = self._events.get(key)
+            if ev is None:
+                continue
+            t = seconds[rows]
+            ok = np.isfinite(t)
+            out[rows[ok]] = self._points(ev, t[ok], extrapolate, clamp)
+        return out
+
+    def score_frame(self, df: pd.DataFrame, seconds_col: str = "s", event_col: str = "Versenyszám",
+                    gender_col: str = "Gender", gender: str | None = None, clamp: bool = True,
+                    extrapolate: bool = False) -> pd.Series:
+        g = gender if gender is not None else df[gender_col].to_numpy()
+        pts = self.points_batch(g, df[event_col].to_numpy(), df[seconds_col].to_numpy(), clamp=clamp,
+                                extrapolate=extrapolate)
+        return pd.Series(pts, index=df.index)
+
+    # ====== Inverz: pont -> idő ======
+    @staticmethod
+    def _root(ev: dict, points: np.ndarray) -> np.ndarray:
+        """P(t) = points megoldása a csökkenő ágon (NaN, ha nincs megoldás)."""
+        a, b, c = ev["a"], ev["b"], ev["c"] - points
+        disc = b * b - 4 * a * c
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sq = np.sqrt(np.where(disc >= 0, disc, np.nan))
+            # numerikusan stabil gyökképlet; a csökkenő ágon P'(x) = 2ax + b < 0
+            q = -0.5 * (b + math.copysign(1.0, b) * sq)
+            r1, r2 = q / a, c / q
+            x = np.where(2 * a * r1 + b < 0, r1, r2)
+        return ev["mu"] + x * ev["sd"]
+
+    def _seconds(self, ev: dict, points: np.ndarray, interpolate: bool) -> np.ndarray:
+        # mint a tábla (pontértékenként egy sor: a leglassabb idő, amellyel még megvan); a
+        # tábla szélein túli pontszámra a szélső időt adjuk
+        points = np.clip(points, ev["p_min"], ev["p_max"])
+        res = ev["res"]
+        # a két szomszédos sor: a legkisebb >= points és a legnagyobb < points pontértékű
+        k_hi = self._slowest_k(ev, points)
+        p_hi = self._points(ev, _grid_seconds(k_hi, res), extrapolate=False)
+        p_lo = self._points(ev, _grid_seconds(k_hi + 1, res), extrapolate=False)
+        k_lo = self._slowest_k(ev, p_lo)
+        if interpolate:
+            # a sorok közt lineárisan, mint a `ScoreTable` (np.interp a táblasorokon)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                w = np.where(p_hi > p_lo, (points - p_lo) / (p_hi - p_lo), 1.0)
+            t_hi, t_lo = _grid_seconds(k_hi, res), _grid_seconds(k_lo, res)
+            return t_lo + w * (t_hi - t_lo)
+        # a pontszámban legközelebbi sor, egyenlőségnél a magasabb pont
+        take_hi = np.abs(p_hi - points) <= np.abs(points - p_lo)
+        return _grid_seconds(np.where(take_hi, k_hi, k_lo), res)
+
+    def _slowest_k(self, ev: dict, points: np.ndarray) -> np.ndarray:
+        """A leglassabb rácsindex, amelyre P >= points (a gyök körül kivételekkel együtt lépkedünk)."""
+        res = ev["res"]
+        k_min, k_max = round(ev["t_min"] / res), round(ev["t_max"] / res)
+        # a táblapont egész: P >= points  <=>  P >= ceil(points)
+        k = np.floor(np.round(self._root(ev, np.ceil(points)) / res, 6))
+        k = np.clip(np.nan_to_num(k, nan=k_max), k_min, k_max).astype(np.int64)
+
+        def p_at(idx):
+            return self._points(ev, _grid_seconds(idx, res), extrapolate=False)
+
+        # a kivételsávok (ahol a tábla eltér a képlettől) rövidek: néhány lépés elég
+        while (down := (p_at(k) < points) & (k > k_min)).any():
+            k = np.where(down, k - 1, k)
+        while (up := (p_at(np.minimum(k + 1, k_max)) >= points) & (k < k_max)).any():
+            k = np.where(up, k + 1, k)
+        return k
+
+    def seconds_for(self, gender: str, discipline: str, points: float, interpolate: bool = False) -> float | None:
+        ev = self._events.get((gender, discipline))
+        if ev is None or points is None or not np.isfinite(points):
+            return None
+        t = float(self._seconds(ev, np.array([points], dtype=float), interpolate)[0])
+        return t if np.isfinite(t) else None
+
+    def seconds_batch(self, gender, discipline, points, interpolate: bool = False) -> np.ndarray:
+        points = np.asarray(points, dtype=float).reshape(-1)
+        out = np.full(len(points), np.nan)
+        for key, rows in _event_groups(gender, discipline, len(points)):
+            ev = self._events.get(key)
+            if ev is None:
+                continue
+            p = points[rows]
+            ok = np.isfinite(p)
+            out[rows[ok]] = self._seconds(ev, p[ok], interpolate)
+        return out
+
+    def equivalent_times(self, gender: str, points, interpolate: bool = True) -> pd.DataFrame:
+        """Mint a `ScoreTable.equivalent_times`: index = versenyszám, oszlopok = pontszámok (mp)."""
+        points = np.atleast_1d(np.asarray(points, dtype=float))
+        events = self.events(gender)
+        out = np.array([self.seconds_batch(gender, e, points, interpolate=interpolate) for e in events])
+        return pd.DataFrame(out.reshape(len(events), len(points)),
+                            index=pd.Index(events, name="Versenyszám"), columns=points)
+
+
+# ====== Illesztés ======
+def _fit_event(sec: np.ndarray, pts: np.ndarray, res: float) -> dict:
+    """
+    Két lépéses LP: (1) L1 minimalizálással megkeressük azokat a feltételeket,
+    amelyeket a táblában hiányzó sorok sértenek, (2) ezeket lazítva maximális
+    biztonsági sávval illesztjük az együtthatókat.
+    """
+    try:
+        from scipy.optimize import linprog
+    except ImportError as e:
+        raise RuntimeError("Az együtthatók illesztéséhez scipy szükséges (pip install scipy).") from e
+
+    mu, sd = float(sec.mean()), float(sec.std()) or 1.0
+
+    def feats(t):
+        x = (t - mu) / sd
+        return np.column_stack([x * x, x, np.ones_like(x)])
+
+    n = len(sec)
+    # P(t_p) >= p, és a gyorsabb szomszéd utáni első rácspontban P < p + 1
+    A = np.vstack([-feats(sec), feats(sec[:-1] + res)])
+    b = np.concatenate([-pts, pts[1:] + 1])
+    m = len(b)
+    eps = 1e-6
+
+    l1 = linprog(c=np.r_[np.zeros(3), np.ones(m)], A_ub=np.hstack([A, -np.eye(m)]), b_ub=b - eps,
+                 bounds=[(None, None)] * 3 + [(0, None)] * m, method="highs")
+    keep = np.ones(m, bool)
+    b_rel = b.copy()
+    if l1.status == 0:
+        for i in np.flatnonzero(l1.x[3:] > 1e-9):
+            if i >= n:
+                b_rel[i] = pts[i - n]  # hiányzó pont a táblában: a gyorsabb sor pontja a korlát
+            else:
+                keep[i] = False
+
+    lp = linprog(c=[0, 0, 0, -1], A_ub=np.hstack([A[keep], np.ones((keep.sum(), 1))]), b_ub=b_rel[keep],
+                 bounds=[(None, None)] * 3 + [(None, 1)], method="highs")
+    if lp.status != 0:
+        raise RuntimeError(f"Sikertelen illesztés: {lp.message}")
+    a, b_, c = (float(v) for v in lp.x[:3])
+    return {"mu": mu, "sd": sd, "a": a, "b": b_, "c": c, "res": res,
+            "t_min": float(sec[0]), "t_max": float(sec[-1]),
+            "p_min": float(pts[-1]), "p_max": float(pts[0])}
+
+
+def _table_event(table: ScoreTable, key) -> tuple[np.ndarray, np.ndarray, float]:
+    sec, pts = table.event_arrays(*key)
+    sec = np.round(sec.astype(np.float64), 2)
+    res = 1.0 if np.all(sec == np.round(sec)) else 0.01
+    return sec, pts.astype(np.float64), res
+
+
+def _grid_compare(table: ScoreTable, key, ev: dict):
+    """(rácsidők indexe, táblás pont, képletes pont) a teljes táblatartományon."""
+    sec, pts, res = _table_event(table, key)
+    k = _grid(ev["t_min"], ev["t_max"], res)
+    t = _grid_seconds(k, res)
+    tab = pts[np.searchsorted(sec, t, side="left")]
+    return k, tab, ScoreModel._raw_points(ev, t)
+
+
+def fit(table: ScoreTable | None = None) -> dict:
+    """Minden versenyszám illesztése; a kivételek a tábla és a képlet eltérései."""
+    table = table or _read_table(WA_CSV)
+    out = []
+    for key in sorted(table._index):
+        sec, pts, res = _table_event(table, key)
+        ev = _fit_event(sec, pts, res)
+        k, tab, mod = _grid_compare(table, key, ev)
+        bad = tab != mod
+        ev["exceptions"] = [[int(i), int(p)] for i, p in zip(k[bad], tab[bad])]
+        out.append({"gender": key[0], "discipline": key[1], **ev})
+    return {"source_sha256": hashlib.sha256(Path(WA_CSV).read_bytes()).hexdigest(), "events": out}
+
+
+def validate(model: ScoreModel, table: ScoreTable | None = None) -> pd.DataFrame:
+    """
+    Validációs riport versenyszámonként: minden táblasort és a táblatartomány
+    minden rácspontját összeveti a táblás kereséssel.
+    """
+    table = table or _read_table(WA_CSV)
+    rows = []
+    for key in sorted(table._index):
+        ev = model._events.get(key)
+        sec, pts, res = _table_event(table, key)
+        if ev is None:
+            rows.append({"gender": key[0], "discipline": key[1], "rows": len(sec), "missing": True})
+            continue
+        k, tab, raw = _grid_compare(table, key, ev)
+        t = _grid_seconds(k, res)
+        exact = model._points(ev, t, extrapolate=False)
+        row_pts = model._points(ev, sec, extrapolate=False)
+        # inverz (pont -> idő): egész és tört pontszámok, legközelebbi sor és interpoláció
+        p = np.arange(np.floor(pts.min()) - 1, np.ceil(pts.max()) + 2)
+        p = np.concatenate([p, p + 0.25, p + 0.5])
+        inverse_bad = sum(
+            int((np.abs(model.seconds_batch(*key, p, interpolate=interp)
+                        - table.seconds_batch(*key, p, interpolate=interp)) > 1e-6).sum())
+            for interp in (False, True))
+        rows.append({
+            "gender": key[0], "discipline": key[1], "rows": len(sec), "missing": False,
+            "row_mismatch": int((row_pts != pts).sum()),
+            "grid_points": len(k),
+            "formula_mismatch": int((raw != tab).sum()),
+            "exceptions": len(ev["exc_k"]),
+            "mismatch": int((exact != tab).sum()),
+            "inverse_points": 2 * len(p),
+            "inverse_mismatch": inverse_bad,
+        })
+    return pd.DataFrame(rows)
+
+
+@functools.lru_cache(maxsize=None)
+def load_score_model(path: str | Path = WA_COEFFICIENTS) -> ScoreModel:
+    """Folyamatonként egyszer betöltött modell (a CSV-vel való egyezés ellenőrzésével)."""
+    return ScoreModel.from_json(path)
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "fit":
+        data = fit()
+        WA_COEFFICIENTS.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        print(f"Együtthatók mentve: {WA_COEFFICIENTS}")
+    elif cmd != "validate":
+        print("Használat: python wa_formula.py fit|validate")
+        sys.exit(2)
+
+    report = validate(ScoreModel.from_json(WA_COEFFICIENTS))
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(report.to_string(index=False))
+    total = int(report["mismatch"].sum()) + int(report["inverse_mismatch"].sum()) + int(report["missing"].sum())
+    print(f"\nVersenyszámok: {len(report)} | rácspontok: {int(report['grid_points'].sum())} | "
+          f"inverz lekérések: {int(report['inverse_points'].sum())} | "
+          f"képlet-eltérés (kivétel): {int(report['exceptions'].sum())} | eltérés: {total}")
+    sys.exit(1 if total else 0)
@@ -0,0 +1,472 @@
+# wa_scores.py
+"""
+WA ponttábla motor.
+
+A `wa_score_merged_standardized.csv` táblát folyamatonként egyszer dolgozzuk fel:
+(gender, discipline) szerint csoportosítva, időre rendezve, összefüggő NumPy
+tömbökbe. Egy pontkeresés ezután egyetlen O(log n) bináris keresés, pandas nélkül.
+
+A CSV-ből egy kompakt bináris artefaktum is fordítható (`python wa_scores.py build`),
+amelyet az appok csak olvasható módon memory-mapelnek, így a hidegindítás szinte
+ingyenes, és több Streamlit worker ugyanazokat a memórialapokat használja.
+
+A betöltött tábla a folyamat összes oldala és sessionje közt közös
+(`load_score_table`); a CSV cseréjét mtime + tartalom hash alapján észleli,
+és az új táblát egy lépésben cseréli be. WA_SCORE_BACKEND=formula mellett a
+tábla helyett a zárt alakú `wa_formula.ScoreModel` töltődik be (ugyanazzal az API-val).
+"""
+import functools
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from time_parse import to_seconds
+
+WA_CSV = Path(__file__).resolve().parent / "wa_score_merged_standardized.csv"
+
+# ====== Bináris artefaktum formátum ======
+# fejléc | név-tábla (JSON) | gender kód (u1) | discipline kód (u2) | offsetek (u4)
+# | idők (f4) | pontok (i2) — minden szekció 8 bájtra igazítva
+ARTIFACT_SUFFIX = ".bin"
+_MAGIC = b"WASC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIIQq32sI")  # magic, verzió, -, sorok, események, névhossz,
+                                           # csv méret, csv mtime_ns, csv sha256, payload crc32
+SECONDS_DTYPE = np.float32
+POINTS_DTYPE = np.int16
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _csv_fingerprint(csv_path: Path) -> tuple[int, int]:
+    st = csv_path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def _sha256(path: Path) -> bytes:
+    return hashlib.sha256(path.read_bytes()).digest()
+
+
+class ScoreTable:
+    """
+    Versenyszámonként növekvő időre rendezett pont-tábla.
+
+    `seconds` (float32) és `points` (int16) egyetlen összefüggő tömb; az
+    (gender, discipline) kulcs a [lo, hi) szeletet adja meg benne.
+    """
+
+    def __init__(self, seconds: np.ndarray, points: np.ndarray, index: dict, buffer=None):
+        self.seconds = seconds
+        self.points = points
+        self._index = index
+        self._buffer = buffer  # mmap esetén életben kell tartani
+        self._inverse_cache = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ScoreTable":
+        sec = to_seconds(df["result"])
+        keep = np.isfinite(sec)
+        gender = df["gender"].to_numpy()[keep]
+        disc = df["discipline"].to_numpy()[keep]
+        sec = sec[keep]
+        pts = df["score"].to_numpy()[keep]
+
+        order = np.lexsort((sec, disc, gender))
+        gender, disc, sec, pts = gender[order], disc[order], sec[order], pts[order]
+
+        index = {}
+        if len(sec):
+            brk = np.flatnonzero((gender[1:] != gender[:-1]) | (disc[1:] != disc[:-1])) + 1
+            starts = np.concatenate(([0], brk))
+            ends = np.concatenate((brk, [len(sec)]))
+            for lo, hi in zip(starts, ends):
+                index[(gender[lo], disc[lo])] = (int(lo), int(hi))
+
+        return cls(np.ascontiguousarray(sec, dtype=SECONDS_DTYPE),
+                   np.ascontiguousarray(pts, dtype=POINTS_DTYPE),
+                   index)
+
+    @classmethod
+    def from_artifact(cls, path: str | Path) -> "ScoreTable":
+        """Csak olvasható mmap; a tömbök közvetlenül a fájl lapjaira mutatnak."""
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, n_rows, n_events, names_len, _, _, _, crc = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Ismeretlen artefaktum formátum: {path}")
+
+        pos = _HEADER.size
+        names = json.loads(bytes(buf[pos:pos + names_len]).decode("utf-8"))
+        pos = _pad8(pos + names_len)
+        if zlib.crc32(buf[pos:]) != crc:
+            raise ValueError(f"Sérült artefaktum (checksum): {path}")
+
+        def take(dtype, count):
+            nonlocal pos
+            arr = np.frombuffer(buf, dtype=dtype, count=count, offset=pos)
+            pos = _pad8(pos + arr.nbytes)
+            return arr
+
+        g_codes = take(np.uint8, n_events)
+        d_codes = take(np.uint16, n_events)
+        offsets = take(np.uint32, n_events + 1)
+        seconds = take(SECONDS_DTYPE, n_rows)
+        points = take(POINTS_DTYPE, n_rows)
+
+        index = {
+            (names["genders"][g], names["disciplines"][d]): (int(offsets[i]), int(offsets[i + 1]))
+            for i, (g, d) in enumerate(zip(g_codes, d_codes))
+        }
+        return cls(seconds, points, index, buffer=buf)
+
+    def to_artifact(self, path: str | Path, csv_path: str | Path | None = None) -> None:
+        """Kiírja a bináris artefaktumot (atomikusan, temp fájlon keresztül)."""
+        keys = sorted(self._index, key=lambda k: self._index[k][0])
+        genders = sorted({g for g, _ in keys})
+        disciplines = sorted({d for _, d in keys})
+        g_codes = np.array([genders.index(g) for g, _ in keys], dtype=np.uint8)
+        d_codes = np.array([disciplines.index(d) for _, d in keys], dtype=np.uint16)
+        offsets = np.array([self._index[k][0] for k in keys] + [len(self.seconds)], dtype=np.uint32)
+
+        payload = bytearray()
+        for arr in (g_codes, d_codes, offsets,
+                    np.asarray(self.seconds, dtype=SECONDS_DTYPE),
+                    np.asarray(self.points, dtype=POINTS_DTYPE)):
+            payload += arr.tobytes()
+            payload += b"\0" * (_pad8(len(payload)) - len(payload))
+
+        csv_size, csv_mtime, csv_hash = 0, 0, b"\0" * 32
+        if csv_path is not None:
+            csv_path = Path(csv_path)
+            csv_size, csv_mtime = _csv_fingerprint(csv_path)
+            csv_hash = _sha256(csv_path)
+
+        names = json.dumps({"genders": genders, "disciplines": disciplines}).encode("utf-8")
+        header = _HEADER.pack(_MAGIC, _VERSION, 0, len(self.seconds), len(keys), len(names),
+                              csv_size, csv_mtime, csv_hash, zlib.crc32(payload))
+        head = header + names
+        head += b"\0" * (_pad8(len(head)) - len(head))
+
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(head + payload)
+        os.replace(tmp, path)
+
+    def events(self, gender: str | None = None) -> list[str]:
+        return sorted({d for g, d in self._index if gender is None or g == gender})
+
+    def event_arrays(self, gender: str, discipline: str):
+        """(seconds, points) nézet az adott versenyszámra, vagy None."""
+        span = self._index.get((gender, discipline))
+        if span is None:
+            return None
+        lo, hi = span
+        return self.seconds[lo:hi], self.points[lo:hi]
+
+    def points_for(self, gender: str, discipline: str, seconds: float, clamp: bool = True) -> int | None:
+        """
+        Az első olyan táblabeli idő pontja, amely >= a megadott idő.
+        A táblánál lassabb időre `clamp=True` esetén a legkisebb pont, különben None.
+        """
+        arrs = self.event_arrays(gender, discipline)
+        if arrs is None or seconds is None or not np.isfinite(seconds):
+            return None
+        sec, pts = arrs
+        # ugyanarra a pontosságra kerekítünk, mint a tábla, különben a pontos egyezés elcsúszhat
+        idx = int(np.searchsorted(sec, sec.dtype.type(seconds), side="left"))
+        if idx >= len(sec):
+            if not clamp:
+                return None
+            idx = len(sec) - 1
+        return int(pts[idx])
+
+    def points_batch(self, gender, discipline, seconds, clamp: bool = True) -> np.ndarray:
+        """
+        Vektorizált pontozás: soronként (gender, discipline, seconds), a gender és
+        a discipline lehet skalár is. Versenyszámonként egyetlen searchsorted fut.
+        Visszatérés: float tömb, NaN ahol nincs pont (ismeretlen szám, hibás idő,
+        vagy `clamp=False` mellett a táblánál lassabb idő).
+        """
+        seconds = np.asarray(seconds, dtype=float).reshape(-1)
+        out = np.full(len(seconds), np.nan)
+        for key, rows in _event_groups(gender, discipline, len(seconds)):
+            arrs = self.event_arrays(*key)
+            if arrs is None:
+                continue
+            sec, pts = arrs
+            t = seconds[rows]
+            ok = np.isfinite(t)
+            rows, t = rows[ok], t[ok]
+            idx = np.searchsorted(sec, t.astype(sec.dtype), side="left")
+            over = idx >= len(sec)
+            if clamp:
+                idx[over] = len(sec) - 1
+            else:
+                rows, idx = rows[~over], idx[~over]
+            out[rows] = pts[idx]
+        return out
+
+    def score_frame(self, df: pd.DataFrame, seconds_col: str = "s", event_col: str = "Versenyszám",
+                    gender_col: str = "Gender", gender: str | None = None, clamp: bool = True) -> pd.Series:
+        """`points_batch` DataFrame-re; `gender` megadásakor az minden sorra érvényes."""
+        g = gender if gender is not None else df[gender_col].to_numpy()
+        pts = self.points_batch(g, df[event_col].to_numpy(), df[seconds_col].to_numpy(), clamp=clamp)
+        return pd.Series(pts, index=df.index)
+
+    # ====== Inverz irány: pont -> idő ======
+    def _inverse(self, gender: str, discipline: str):
+        """(növekvő pontok, hozzájuk tartozó idők) float64-ben, versenyszámonként egyszer építve."""
+        key = (gender, discipline)
+        inv = self._inverse_cache.get(key)
+        if inv is None:
+            arrs = self.event_arrays(gender, discipline)
+            if arrs is None:
+                return None
+            sec, pts = arrs
+            # a tábla századmásodperc felbontású: a float32 zajt itt visszakerekítjük
+            inv = (np.ascontiguousarray(pts[::-1], dtype=np.float64),
+                   np.round(sec[::-1].astype(np.float64), 2))
+            self._inverse_cache[key] = inv
+        return inv
+
+    @staticmethod
+    def _solve_inverse(inv, points: np.ndarray, interpolate: bool) -> np.ndarray:
+        pts, sec = inv
+        if interpolate:
+            # szakaszonként lineáris; a tábla szélein a szélső időt adja
+            return np.interp(points, pts, sec)
+        # legközelebbi táblasor pontszám szerint (egyenlőségnél a magasabb pont)
+        hi = np.clip(np.searchsorted(pts, points, side="left"), 0, len(pts) - 1)
+        lo = np.clip(hi - 1, 0, len(pts) - 1)
+        take_hi = np.abs(pts[hi] - points) <= np.abs(points - pts[lo])
+        return sec[np.where(take_hi, hi, lo)]
+
+    def seconds_for(self, gender: str, discipline: str, points: float, interpolate: bool = False) -> float | None:
+        """Pontszámhoz tartozó idő; `interpolate=True` esetén tört pontra is a sorok közt interpolál."""
+        inv = self._inverse(gender, discipline)
+        if inv is None or points is None or not np.isfinite(points):
+            return None
+        return float(self._solve_inverse(inv, np.array([points], dtype=float), interpolate)[0])
+
+    def seconds_batch(self, gender, discipline, points, interpolate: bool = False) -> np.ndarray:
+        """`seconds_for` vektorizáltan, versenyszámonként egy kereséssel; NaN ahol nincs megoldás."""
+        points = np.asarray(points, dtype=float).reshape(-1)
+        out = np.full(len(points), np.nan)
+        for key, rows in _event_groups(gender, discipline, len(points)):
+            inv = self._inverse(*key)
+            if inv is None:
+                continue
+            p = points[rows]
+            ok = np.isfinite(p)
+            out[rows[ok]] = self._solve_inverse(inv, p[ok], interpolate)
+        return out
+
+    def _stacked_inverse(self, gender: str):
+        """
+        Egy nem összes versenyszámának inverz táblája egymás után fűzve:
+        (versenyszámok, szelet-kezdetek, szelet-végek, kulcsok, pontok, idők), ahol
+        kulcs = versenyszám sorszáma · ELTOLÁS + pont, így egyetlen searchsorted elég.
+        """
+        key = ("__stack__", gender)
+        stack = self._inverse_cache.get(key)
+        if stack is None:
+            events = self.events(gender)
+            invs = [self._inverse(gender, e) for e in events]
+            lens = np.array([len(p) for p, _ in invs])
+            ends = np.cumsum(lens)
+            starts = ends - lens
+            pts = np.concatenate([p for p, _ in invs])
+            sec = np.concatenate([t for _, t in invs])
+            offset = float(np.abs(pts).max()) * 4 + 10
+            keys = np.repeat(np.arange(len(events)), lens) * offset + pts
+            stack = (events, starts, ends, offset, keys, pts, sec)
+            self._inverse_cache[key] = stack
+        return stack
+
+    def equivalent_times(self, gender: str, points, interpolate: bool = True) -> pd.DataFrame:
+        """
+        Egyenértékű idők: a megadott pontszám(ok)hoz tartozó idő a nem összes versenyszámában,
+        egyetlen vektorizált kereséssel (`seconds_for` minden számra és pontra egyszerre).
+        Visszatérés: DataFrame, index = versenyszám, oszlopok = pontszámok (mp).
+        """
+        points = np.atleast_1d(np.asarray(points, dtype=float))
+        events, starts, ends, offset, keys, pts, sec = self._stacked_inverse(gender)
+        ev = np.arange(len(events))[:, None]
+        q = np.broadcast_to(points[None, :], (len(events), len(points)))
+        lo_b, hi_b = starts[:, None], ends[:, None] - 1
+        hi = np.clip(np.searchsorted(keys, ev * offset + q, side="left"), lo_b, hi_b)
+        lo = np.clip(hi - 1, lo_b, hi_b)
+        if interpolate:
+            # mint az np.interp: a sorok között lineáris, a szélein a szélső idő
+            span = pts[hi] - pts[lo]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                frac = np.where(span > 0, (q - pts[lo]) / span, 1.0)
+            out = sec[lo] + np.clip(frac, 0.0, 1.0) * (sec[hi] - sec[lo])
+            out = np.where(q <= pts[starts][:, None], sec[starts][:, None], out)
+        else:
+            take_hi = np.abs(pts[hi] - q) <= np.abs(q - pts[lo])
+            out = sec[np.where(take_hi, hi, lo)]
+        out = np.where(np.isfinite(q), out, np.nan)
+        return pd.DataFrame(out, index=pd.Index(events, name="Versenyszám"), columns=points)
+
+
+def _event_groups(gender, discipline, n: int):
+    """((gender, discipline), sorindexek) párok; a gender és a discipline lehet skalár is."""
+    if n == 0:
+        return []
+    keys = pd.DataFrame({
+        "g": np.broadcast_to(np.asarray(gender, dtype=object), (n,)),
+        "d": np.broadcast_to(np.asarray(discipline, dtype=object), (n,)),
+    })
+    return keys.groupby(["g", "d"], sort=False).indices.items()
+
+
+def artifact_path(csv_path: str | Path) -> Path:
+    return Path(csv_path).with_suffix(ARTIFACT_SUFFIX)
+
+
+def artifact_is_fresh(csv_path: str | Path, art_path: str | Path | None = None) -> bool:
+    """Az artefaktum a jelenlegi CSV-ből készült-e (méret+mtime, eltérés esetén sha256)."""
+    csv_path = Path(csv_path)
+    art_path = Path(art_path) if art_path else artifact_path(csv_path)
+    try:
+        with open(art_path, "rb") as f:
+            head = f.read(_HEADER.size)
+        magic, version, _, _, _, _, size, mtime, digest, _ = _HEADER.unpack(head)
+        if magic != _MAGIC or version != _VERSION:
+            return False
+        if (size, mtime) == _csv_fingerprint(csv_path):
+            return True
+        return size == csv_path.stat().st_size and digest == _sha256(csv_path)
+    except (OSError, struct.error):
+        return False
+
+
+def build_artifact(csv_path: str | Path = WA_CSV, art_path: str | Path | None = None) -> Path:
+    """CSV -> bináris artefaktum fordítás."""
+    art_path = Path(art_path) if art_path else artifact_path(csv_path)
+    ScoreTable.from_frame(pd.read_csv(csv_path)).to_artifact(art_path, csv_path=csv_path)
+    return art_path
+
+
+def _read_table(path: Path) -> ScoreTable:
+    """
+    Friss artefaktum esetén mmap; ha hiányzik vagy elavult, a CSV-ből olvasunk,
+    és megpróbáljuk újraépíteni (csak olvasható fájlrendszeren ez kimarad).
+    """
+    art = artifact_path(path)
+    if artifact_is_fresh(path, art):
+        try:
+            return ScoreTable.from_artifact(art)
+        except (OSError, ValueError):
+            pass
+
+    table = ScoreTable.from_frame(pd.read_csv(path))
+    try:
+        table.to_artifact(art, csv_path=path)
+    except OSError:
+        pass
+    return table
+
+
+# ====== Folyamatszintű, közös betöltés hot reloaddal ======
+# legfeljebb ennyi másodpercenként nézzük meg (egy stat() hívással), változott-e a CSV
+RELOAD_CHECK_SEC = float(os.environ.get("WA_SCORE_RELOAD_SEC", "2"))
+# "table": mmap-elt ponttábla; "formula": illesztett együtthatók (wa_score_coefficients.json)
+SCORE_BACKEND = os.environ.get("WA_SCORE_BACKEND", "table").strip().lower()
+
+
+def _read_scorer(path: Path, digest: bytes):
+    """A beállított backend betöltése; a formula együtthatóit a CSV hash-éhez kötjük."""
+    if SCORE_BACKEND == "formula":
+        from wa_formula import ScoreModel  # körkörös import elkerülése
+        return ScoreModel.from_json(expected_sha256=digest.hex())
+    if SCORE_BACKEND != "table":
+        raise ValueError(f"Ismeretlen WA_SCORE_BACKEND: {SCORE_BACKEND!r} (table | formula)")
+    return _read_table(path)
+
+
+class _Loaded(NamedTuple):
+    table: ScoreTable
+    fingerprint: tuple[int, int]   # (méret, mtime_ns)
+    digest: bytes                  # a CSV tartalmának sha256-ja
+    version: int
+    checked: float                 # utolsó ellenőrzés (time.monotonic)
+
+
+_loaded: dict[str, _Loaded] = {}
+_load_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=64)
+def _table_key(path: str) -> str:
+    return os.path.realpath(path)
+
+
+def load_score_table(path: str | Path = WA_CSV) -> ScoreTable:
+    """
+    A folyamat összes oldala és sessionje által közösen használt, csak olvasható
+    ponttábla (útvonalanként; relatív és abszolút útvonal ugyanazt adja), vagy
+    WA_SCORE_BACKEND=formula esetén a vele egyező `ScoreModel`.
+
+    A CSV-t legfeljebb RELOAD_CHECK_SEC-enként ellenőrizzük: ha a méret/mtime
+    változott és a tartalom hash-e is, az új táblát betöltjük és egy lépésben
+    cseréljük le. A régi példányt használó futások változatlanul befejeződnek.
+    """
+    key = _table_key(str(path))
+    entry = _loaded.get(key)
+    now = time.monotonic()
+    if entry is not None and now - entry.checked < RELOAD_CHECK_SEC:
+        return entry.table
+
+    with _load_lock:
+        entry = _loaded.get(key)
+        if entry is not None and now - entry.checked < RELOAD_CHECK_SEC:
+            return entry.table
+        try:
+            fingerprint = _csv_fingerprint(Path(key))
+        except OSError:
+            if entry is None:
+                raise
+            # a fájl épp cserélődik vagy eltűnt: a betöltött tábla marad érvényben
+            _loaded[key] = entry._replace(checked=now)
+            return entry.table
+        if entry is not None and fingerprint == entry.fingerprint:
+            _loaded[key] = entry._replace(checked=now)
+            return entry.table
+
+        digest = _sha256(Path(key))
+        if entry is not None and digest == entry.digest:  # csak az mtime változott (pl. touch)
+            _loaded[key] = entry._replace(fingerprint=fingerprint, checked=now)
+            return entry.table
+
+        table = _read_scorer(Path(key), digest)
+        _loaded[key] = _Loaded(table, fingerprint, digest, entry.version + 1 if entry else 1, now)
+        return table
+
+
+def score_table_version(path: str | Path = WA_CSV) -> int:
+    """A betöltött tábla verziója (újratöltésenként nő); cache kulcsnak jó."""
+    load_score_table(path)
+    return _loaded[_table_key(str(path))].version
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Használat: python wa_scores.py build [csv] [kimenet]")
+        sys.exit(2)
+    out = build_artifact(*sys.argv[2:4])
+    print(f"Artefaktum kész: {out} ({out.stat().st_size} bájt)")